@@ -1,8 +1,9 @@
-import requests
 from enum import Enum
 from collections import defaultdict
 
-from crypto.constants import Currency
+import transfer.aio as aio
+import transfer.venue as venues
+from transfer.constants import Currency
 
 
 class Operation(Enum):
@@ -26,20 +27,40 @@ class ExchangeRate:
         return f'[{self.price_type.value}] 1 {self.from_currency.value} ~ {self.to_currency.value} {self.rate}'
 
 
+def _currency_pairs(pairs):
+    """The (base, quote) code pairs among `pairs` whose assets are both a Currency, as Currency pairs."""
+    codes = {currency.value for currency in Currency}
+    return {(Currency(base), Currency(quote)) for base, quote in pairs if base in codes and quote in codes}
+
+
 class Broker:
     name = 'N/A'
-    api_url = 'N/A'
+    venue = None    # Name of the venue adapter in venues.yaml
     available_pairs = {}
     buy_fees = {}
     sell_fees = {}
+    _registry = {}
 
     def __init__(self, commission=0.0):
         self.commission = commission
         self._exchange_rates = defaultdict(list)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Broker._registry[cls.name] = cls
+        Broker._registry[cls.venue] = cls
+
     @classmethod
     def create(cls, name):
-        return next(subclass() for subclass in cls.__subclasses__() if subclass.name == name)
+        """Create the broker registered under `name` or venue, or a plain broker for a venue without a class."""
+        if name in cls._registry:
+            return cls._registry[name]()
+
+        broker = Broker()
+        broker.name = broker.venue = name
+        # A venue read without a list of pairs learns them from its quotes on the first sync
+        broker.available_pairs = _currency_pairs(venues.get(name).pairs or ())
+        return broker
 
     def get_pair(self, src_currency, dst_currency):
         if (src_currency, dst_currency) in self.available_pairs:
@@ -49,8 +70,24 @@ class Broker:
         else:
             raise ValueError
 
-    def sync_exchange_rate(self, src_currency, dst_currency):
-        raise NotImplementedError
+    def sync_exchange_rate(self, src_currency, dst_currency, snapshot=None):
+        return aio.run(self.sync_exchange_rate_async(src_currency, dst_currency, snapshot))
+
+    async def sync_exchange_rate_async(self, src_currency, dst_currency, snapshot=None):
+        """Replace the rates of the pair with the venue's current quote, or its quote in `snapshot`."""
+        if snapshot is not None:
+            quotes = snapshot.quotes(self.venue)
+        else:
+            quotes = await venues.get(self.venue).quotes_async()
+
+        if not self.available_pairs:
+            self.available_pairs = _currency_pairs(quotes)
+        pair = self.get_pair(src_currency, dst_currency)
+        bid, ask = quotes[tuple(c.value for c in pair)]
+
+        self._exchange_rates.pop(pair, None)
+        self.add_exchange_rate(pair, ExchangeRate(PriceType.ASK, *pair, ask))
+        self.add_exchange_rate(pair, ExchangeRate(PriceType.BID, *pair, bid))
 
     def sell_to_receive(self, amount, of_currency, for_currency):
         """Sell {return_value} to broker to receive {amount}"""
@@ -106,7 +143,7 @@ class Broker:
 
 class RipioBroker(Broker):
     name = 'Ripio'
-    api_url = 'https://app.ripio.com/api/v3/public/rates/?country=AR'
+    venue = 'ripio'
     available_pairs = {
         (Currency.BTC, Currency.ARS),
         (Currency.DAI, Currency.ARS),
@@ -115,44 +152,27 @@ class RipioBroker(Broker):
     def __init__(self):
         super(RipioBroker, self).__init__(commission=0.01)
 
-    def sync_exchange_rate(self, src_currency, dst_currency):
-        pair = self.get_pair(src_currency, dst_currency)
-        key = '_'.join(c.value for c in pair)
-
-        exchange_rate_data = requests.get(self.api_url).json()
-        exchange_rate = next(rate for rate in exchange_rate_data if rate['ticker'] == key)
-
-        self.add_exchange_rate(pair, ExchangeRate(PriceType.ASK, *pair, float(exchange_rate['buy_rate'])))   # noqa
-        self.add_exchange_rate(pair, ExchangeRate(PriceType.BID, *pair, float(exchange_rate['sell_rate'])))  # noqa
-
 
 class SatoshiTangoBroker(Broker):
     name = 'satoshi_tango'
-
-    def __init__(self):
-        super(SatoshiTangoBroker, self).__init__(url='https://api.satoshitango.com/v2/ticker')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url).json()
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(exchange_rate_data['data']['compra']['arsbtc'])))
+    venue = 'satoshi_tango'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+    }
 
 
 class BuenBitBroker(Broker):
     name = 'buenbit'
-
-    def __init__(self):
-        super(BuenBitBroker, self).__init__(url='https://customers.buenbit.com/api/v1/market/tickers')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url).json()
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(exchange_rate_data['object']['btcars']['selling_price'])))
+    venue = 'buenbit'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+        (Currency.DAI, Currency.ARS),
+    }
 
 
 class LetsBit(Broker):
     name = 'Let\'s Bit'
-    api_url = 'https://letsbit.io/api/v1/exchange/public/markets/tickers'
+    venue = 'letsbit'
     available_pairs = {
         (Currency.BTC, Currency.ARS),
         (Currency.DAI, Currency.ARS),
@@ -166,110 +186,66 @@ class LetsBit(Broker):
         Currency.DAI: 10.0,
     }
 
-    def sync_exchange_rate(self, src_currency, dst_currency):
-        pair = self.get_pair(src_currency, dst_currency)
-        key = ''.join(c.value for c in pair).lower()
-
-        exchange_rate_data = requests.get(self.api_url).json()
-        exchange_rate = exchange_rate_data[key]['ticker']
-
-        self.add_exchange_rate(pair, ExchangeRate(PriceType.ASK, *pair, float(exchange_rate['sell'])))
-        self.add_exchange_rate(pair, ExchangeRate(PriceType.BID, *pair, float(exchange_rate['buy'])))
-
 
 class BitsoBroker(Broker):
     name = 'bitso'
-
-    def __init__(self):
-        super(BitsoBroker, self).__init__(url='https://api.bitso.com/v3/ticker/')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url).json()
-        btc_ars_rate = next(rate for rate in exchange_rate_data['payload'] if rate['book'] == 'btc_ars')
-
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(btc_ars_rate['ask'])))
+    venue = 'bitso'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+    }
 
 
 class BitexBroker(Broker):
     name = 'bitex'
-
-    def __init__(self):
-        super(BitexBroker, self).__init__(url='https://bitex.la/api/tickers')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url).json()
-        btc_ars_rate = next(rate for rate in exchange_rate_data['data'] if rate['id'] == 'btc_ars')
-
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(btc_ars_rate['attributes']['ask'])))
+    venue = 'bitex'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+    }
 
 
 class ArgenBTCBroker(Broker):
     name = 'argenbtc'
-
-    def __init__(self):
-        super(ArgenBTCBroker, self).__init__(url='https://argenbtc.com/public/cotizacion_js.php')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url).json()
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(exchange_rate_data['precio_compra'])))
+    venue = 'argenbtc'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+    }
 
 
 class BudaBroker(Broker):
     name = 'buda'
-
-    def __init__(self):
-        super(BudaBroker, self).__init__(url='https://www.buda.com/api/v2/markets')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url + '/btc-ars/ticker').json()
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(exchange_rate_data['ticker']['last_price'][0])))
+    venue = 'buda'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+    }
 
 
 class CryptomarketBroker(Broker):
     name = 'cryptomarket'
-
-    def __init__(self):
-        super(CryptomarketBroker, self).__init__(url='https://api.cryptomkt.com/v1/ticker')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url).json()
-        btc_ars_rate = next(rate for rate in exchange_rate_data['data'] if rate['market'] == 'BTCARS')
-
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(btc_ars_rate['ask'])))
+    venue = 'cryptomarket'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+    }
 
 
 class iBitt(Broker):
     name = 'ibitt'
-
-    def __init__(self):
-        super(iBitt, self).__init__(url='https://api.ibitt.co/v2/public/marketSummaries')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url + '/BTC-ARS').json()
-        self.add_exchange_rate(Operation.SELL, ExchangeRate(currency, Currency.ARS,
-                                                            float(exchange_rate_data['ask'])))
+    venue = 'ibitt'
+    available_pairs = {
+        (Currency.BTC, Currency.ARS),
+    }
 
 
 class BitonicBroker(Broker):
     name = 'bitonic'
-
-    def __init__(self):
-        super(BitonicBroker, self).__init__(url='https://bitonic.nl/api/buy')
-
-    def sync_exchange_rates(self, currency):
-        exchange_rate_data = requests.get(self.url).json()
-        self.add_exchange_rate(Operation.BUY, ExchangeRate(currency, Currency.EUR,
-                                                           float(exchange_rate_data['price'])))
+    venue = 'bitonic'
+    available_pairs = {
+        (Currency.BTC, Currency.EUR),
+    }
 
 
 class BitvavoBroker(Broker):
     name = 'Bitvavo'
-    api_url = 'https://api.bitvavo.com/v2/ticker/book'
+    venue = 'bitvavo'
     available_pairs = [
         (Currency.BTC, Currency.EUR),
         (Currency.DAI, Currency.EUR),
@@ -277,13 +253,3 @@ class BitvavoBroker(Broker):
     buy_fees = {
         Currency.BTC: 0.0003,
     }
-
-    def sync_exchange_rate(self, src_currency, dst_currency):
-        pair = self.get_pair(src_currency, dst_currency)
-        key = '-'.join(c.value for c in pair)
-
-        exchange_rate_data = requests.get(self.api_url).json()
-        exchange_rate = next(rate for rate in exchange_rate_data if rate['market'] == key)
-
-        self.add_exchange_rate(pair, ExchangeRate(PriceType.ASK, *pair, float(exchange_rate['ask'])))   # noqa
-        self.add_exchange_rate(pair, ExchangeRate(PriceType.BID, *pair, float(exchange_rate['bid'])))   # noqa
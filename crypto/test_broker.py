@@ -0,0 +1,24 @@
+import pytest
+
+from crypto.broker import Broker, PriceType, RipioBroker, LetsBit
+from transfer.constants import Currency
+from transfer.snapshot import MarketSnapshot
+
+
+def test_brokers_are_registered_by_name_and_venue():
+    assert isinstance(Broker.create('Ripio'), RipioBroker)
+    assert isinstance(Broker.create('ripio'), RipioBroker)
+    assert isinstance(Broker.create("Let's Bit"), LetsBit)
+    with pytest.raises(ValueError):
+        Broker.create('qubit')
+
+
+def test_broker_declared_only_in_yaml_learns_its_pairs():
+    snapshot = MarketSnapshot().replace({'binance': {('BTC', 'EUR'): (27100.0, 27100.0), ('FOO', 'USDT'): (3.0, 3.0)}})
+    broker = Broker.create('binance')
+    assert broker.available_pairs == set()
+
+    broker.sync_exchange_rate(Currency.EUR, Currency.BTC, snapshot)
+
+    assert broker.available_pairs == {(Currency.BTC, Currency.EUR)}
+    assert broker.exchange_rate(PriceType.BID, Currency.BTC, Currency.EUR).rate == 27100.0
@@ -1,19 +1,47 @@
+import argparse
+
 import yaml
 
-from transfer.route import process_route
+from transfer.route import process_route, route_venues
+from transfer.sensitivity import analyze_routes
+from transfer.simulation import simulate_routes
+from transfer.snapshot import MarketSnapshot
 
 ROUTES_FILE = '/home/wspek/dev/investing/routes.yaml'
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--simulate', action='store_true', help='simulate price drift while transfers settle')
+    parser.add_argument('--paths', type=int, default=100_000, help='number of simulated paths per route')
+    parser.add_argument('--sensitivity', action='store_true', help='show what moves each route and what to refresh')
+    args = parser.parse_args()
+
     with open(ROUTES_FILE) as routes_file:
         try:
             route_config = yaml.safe_load(routes_file)
         except yaml.YAMLError as e:
             print(e)
 
+    if args.simulate:
+        for result in simulate_routes(route_config, paths=args.paths):
+            print(result)
+            print('------')
+        return
+
+    if args.sensitivity:
+        analysis = analyze_routes(route_config)
+        for sensitivity in analysis.sensitivities():
+            print(sensitivity)
+        print('------')
+        for source, priority in analysis.priorities():
+            print(f'{source}: {priority}')
+        return
+
+    # Every route is priced from the same market, fetched at once
+    snapshot = MarketSnapshot.capture(route_venues(route_config))
     for route in route_config:
-        result = process_route(**route)
+        result = process_route(**route, snapshot=snapshot)
         print(result)
         print('------')
 
@@ -0,0 +1,71 @@
+import atexit
+import asyncio
+import threading
+
+import aiohttp
+
+# Connections kept open across every venue and oracle, shared by all requests
+POOL_SIZE = 100
+TIMEOUT = 30
+
+_loop = None
+_session = None
+_lock = threading.Lock()
+
+
+def loop():
+    """The single event loop driving all venue I/O. It runs in one background thread, started on first use."""
+    global _loop
+
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='venue-io', daemon=True).start()
+
+    return _loop
+
+
+def run(coro):
+    """Run a coroutine on the venue I/O loop and block until it completes. This is what the sync wrappers use."""
+    event_loop = loop()
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    if running is event_loop:
+        raise RuntimeError('Cannot block on the venue I/O loop from one of its own coroutines, await instead')
+
+    return asyncio.run_coroutine_threadsafe(coro, event_loop).result()
+
+
+def gather(*coros):
+    return run(_gather(*coros))
+
+
+async def _gather(*coros):
+    return await asyncio.gather(*coros)
+
+
+async def session():
+    global _session
+
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=POOL_SIZE),
+                                         timeout=aiohttp.ClientTimeout(total=TIMEOUT))
+
+    return _session
+
+
+async def get_json(url, headers=None):
+    client = await session()
+
+    async with client.get(url, headers=headers) as response:
+        return await response.json(content_type=None)
+
+
+@atexit.register
+def _close():
+    if _loop is not None and _session is not None and not _session.closed:
+        run(_session.close())
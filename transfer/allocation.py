@@ -0,0 +1,126 @@
+import heapq
+from dataclasses import dataclass
+
+from transfer.route import Direction, build_frozen_routes, route_venues
+from transfer.snapshot import MarketSnapshot
+
+
+@dataclass
+class Allocation:
+    route: object
+    amount: float = 0.0
+    received: float = 0.0
+    capacity: float = None
+
+
+class RouteAllocator:
+    """
+    Split an amount over several routes to maximise the total received.
+
+    Each route is evaluated through Route.send, so its marginal-rate curve comes from the very same fee and
+    exchange logic as a single transfer. The amount is handed out greedily in `steps` equal chunks, each going to
+    the route with the best marginal gain per unit sent. A route that is not used yet is ranked by the average rate
+    it would give on everything it can still take, so its fixed fees are spread over the whole allocation rather
+    than charged against the first chunk. That ranking only gets worse as the remaining amount shrinks, so stale
+    entries are re-evaluated lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, routes, capacities=None, steps=200):
+        for route in routes[1:]:
+            if route.currencies != routes[0].currencies:
+                src_currency, dst_currency = routes[0].currencies
+                raise ValueError(f'{route} does not go from {src_currency.value} to {dst_currency.value}')
+
+        capacities = capacities or [None] * len(routes)
+        self.allocations = [Allocation(route=route, capacity=capacity) for route, capacity in zip(routes, capacities)]
+        self.steps = steps
+        self.unallocated = 0.0
+
+    def allocate(self, amount):
+        """
+        Allocate `amount` and return the allocations. What the capacities of all routes cannot take is left in
+        `unallocated`.
+        """
+        chunk = amount / self.steps
+        remaining = amount
+        tolerance = amount * 1e-12
+
+        for allocation in self.allocations:
+            allocation.amount = allocation.received = 0.0
+
+        ranks = ((self._rank(index, chunk, remaining, tolerance), index) for index in range(len(self.allocations)))
+        heap = [(-rank, index) for rank, index in ranks if rank is not None]
+        heapq.heapify(heap)
+
+        while remaining > tolerance and heap:
+            _, index = heapq.heappop(heap)
+            allocation = self.allocations[index]
+
+            rank = self._rank(index, chunk, remaining, tolerance)
+            if rank is None:
+                continue
+            if heap and rank < -heap[0][0]:
+                heapq.heappush(heap, (-rank, index))
+                continue
+
+            # The last chunk a route takes is clamped to its capacity, so a route smaller than a chunk is usable
+            step = min(chunk, self._room(allocation, remaining))
+            allocation.amount += step
+            allocation.received = self._receive(allocation.route, allocation.amount)
+            remaining -= step
+
+            rank = self._rank(index, chunk, remaining, tolerance)
+            if rank is not None:
+                heapq.heappush(heap, (-rank, index))
+
+        self.unallocated = remaining if remaining > tolerance else 0.0
+        return self.allocations
+
+    @staticmethod
+    def _room(allocation, remaining):
+        return remaining if allocation.capacity is None else min(remaining, allocation.capacity - allocation.amount)
+
+    def _rank(self, index, chunk, remaining, tolerance):
+        """Received per unit sent: for the next chunk of a used route, over all it can take for an unused one."""
+        allocation = self.allocations[index]
+        room = self._room(allocation, remaining)
+
+        if room <= tolerance:
+            return None
+        if allocation.amount > 0.0:
+            step = min(chunk, room)
+            return (self._receive(allocation.route, allocation.amount + step) - allocation.received) / step
+
+        return self._receive(allocation.route, room) / room
+
+    @staticmethod
+    def _receive(route, amount):
+        return route.send(amount, verbose=False)
+
+
+def allocate_routes(amount, route_configs, steps=200, snapshot=None):
+    """
+    Split `amount` over the send routes from routes.yaml. A route may set `capacity`, the most it can take (e.g. the
+    book depth at the quoted price). Every evaluation is priced from `snapshot`, captured here if not given.
+    All routes must be send routes between the same currencies, or their received amounts would not add up.
+    """
+    for config in route_configs:
+        if Direction(config['direction']) != Direction.SEND:
+            raise ValueError('Only send routes can split an amount')
+
+    if snapshot is None:
+        snapshot = MarketSnapshot.capture(route_venues(route_configs))
+
+    routes = build_frozen_routes(route_configs, snapshot)
+    allocator = RouteAllocator(routes, [config.get('capacity') for config in route_configs], steps)
+    allocations = allocator.allocate(amount)
+
+    return {
+        'amount': amount,
+        'unallocated': allocator.unallocated,
+        'received': sum(allocation.received for allocation in allocations),
+        'allocations': [
+            {'route': str(allocation.route), 'amount': allocation.amount, 'received': allocation.received}
+            for allocation in allocations if allocation.amount > 0.0
+        ],
+    }
@@ -0,0 +1,257 @@
+import math
+from collections import deque
+from dataclasses import dataclass, field
+
+import transfer.aio as aio
+import transfer.crypto as crypto
+from transfer.constants import Currency
+
+
+@dataclass
+class Cycle:
+    hops: list                      # [(venue, asset), ...], the first hop is repeated implicitly at the end
+    amount: float                   # Starting amount, expressed in the asset of the first hop
+    received: float                 # Amount back in the first hop after a full turn, fees included
+    legs: list = field(default_factory=list)
+
+    @property
+    def net_return(self):
+        return self.received / self.amount - 1.0
+
+    def __str__(self):
+        path = ' > '.join(f'{venue}:{asset}' for venue, asset in self.hops + self.hops[:1])
+        return f'{path} ({self.net_return:+.4%})'
+
+
+class ArbitrageScanner:
+    """
+    Find profitable cycles across venues from one combined snapshot of quotes.
+
+    Every (venue, asset) holding is a node. Exchanges inside a venue are edges weighted by -log(rate after
+    commission); moving the same asset between venues is an edge whose fixed withdrawal and network fee is
+    amortised over the notional amount. A negative cycle in that graph is a candidate, which is then replayed
+    with the exact fees and reported when its net return beats the threshold.
+    """
+
+    def __init__(self, exchanges, notional=1000.0, reference='USDT', threshold=0.0):
+        self.exchanges = {exchange.name: exchange for exchange in exchanges}
+        self.notional = notional
+        self.reference = reference
+        self.threshold = threshold
+
+    def scan(self, quotes, network_fees=None):
+        """
+        :param quotes: {venue name: {(base, quote): (bid, ask)}}, as returned by CryptoExchange.quotes.
+        :param network_fees: {Currency: fee} as returned by fetch_network_fees. Missing entries count as free.
+        :return: The profitable cycles, best first.
+        """
+        graph = _RateGraph()
+        values = self._asset_values(quotes)
+
+        for venue, venue_quotes in quotes.items():
+            commission = self.exchanges[venue].commission
+            for (base, quote), (bid, ask) in venue_quotes.items():
+                if bid > 0.0 and ask > 0.0:
+                    graph.add_exchange((venue, base), (venue, quote), bid * (1.0 - commission))
+                    graph.add_exchange((venue, quote), (venue, base), (1.0 - commission) / ask)
+
+        self._add_transfers(graph, quotes, values, network_fees or {})
+
+        cycles = []
+        for edges in graph.negative_cycles():
+            cycle = self._replay(graph, edges, values)
+            if cycle is not None and cycle.net_return > self.threshold:
+                cycles.append(cycle)
+
+        return sorted(cycles, key=lambda c: c.net_return, reverse=True)
+
+    def _add_transfers(self, graph, quotes, values, network_fees):
+        holders = {}
+        for venue, venue_quotes in quotes.items():
+            for pair in venue_quotes:
+                for asset in pair:
+                    holders.setdefault(asset, set()).add(venue)
+
+        for currency in Currency:
+            venues = holders.get(currency.value, ())
+            if len(venues) < 2 or currency.value not in values:
+                continue
+
+            notional = self.notional / values[currency.value]
+            for src in venues:
+                fee = self.exchanges[src].withdrawal_fee(currency) + network_fees.get(currency, 0.0)
+                if fee >= notional:
+                    continue
+
+                for dst in venues:
+                    if dst != src:
+                        graph.add_transfer((src, currency.value), (dst, currency.value), fee, 1.0 - fee / notional)
+
+    def _asset_values(self, quotes):
+        """Value of one unit of every asset in the reference asset, from mid prices over any venue."""
+        neighbours = {}
+        for venue_quotes in quotes.values():
+            for (base, quote), (bid, ask) in venue_quotes.items():
+                if bid > 0.0 and ask > 0.0:
+                    mid = (bid + ask) / 2.0
+                    neighbours.setdefault(base, []).append((quote, mid))
+                    neighbours.setdefault(quote, []).append((base, 1.0 / mid))
+
+        values = {self.reference: 1.0}
+        queue = deque([self.reference])
+        while queue:
+            asset = queue.popleft()
+            for other, rate in neighbours.get(asset, ()):
+                if other not in values:
+                    # 1 other = (1 / rate) asset
+                    values[other] = values[asset] / rate
+                    queue.append(other)
+
+        return values
+
+    def _replay(self, graph, edges, values):
+        start = graph.nodes[graph.src[edges[0]]]
+        if start[1] not in values:
+            return None
+
+        amount = received = self.notional / values[start[1]]
+        legs = []
+        for edge in edges:
+            fee = graph.fee[edge]
+            received = received - fee if fee is not None else received * graph.rate[edge]
+            legs.append(received)
+
+            if received <= 0.0:
+                return None
+
+        return Cycle(hops=[graph.nodes[graph.src[edge]] for edge in edges], amount=amount, received=received,
+                     legs=legs)
+
+
+class _RateGraph:
+    # Precision below which a relaxation is considered float noise, in log space
+    epsilon = 1e-12
+
+    def __init__(self):
+        self.nodes = []
+        self._index = {}
+        self.src = []
+        self.dst = []
+        self.weight = []
+        self.rate = []
+        self.fee = []
+
+    def node(self, key):
+        try:
+            return self._index[key]
+        except KeyError:
+            self._index[key] = len(self.nodes)
+            self.nodes.append(key)
+            return self._index[key]
+
+    def add_exchange(self, src, dst, rate):
+        self._add_edge(src, dst, rate, None)
+
+    def add_transfer(self, src, dst, fee, rate):
+        self._add_edge(src, dst, rate, fee)
+
+    def _add_edge(self, src, dst, rate, fee):
+        self.src.append(self.node(src))
+        self.dst.append(self.node(dst))
+        self.weight.append(-math.log(rate))
+        self.rate.append(rate)
+        self.fee.append(fee)
+
+    def negative_cycles(self):
+        """
+        Yield every negative cycle as a list of edge indices, using SPFA from a virtual source.
+
+        The predecessor graph is checked for a cycle every n relaxations. Once one is found, its weakest edge is
+        dropped and the search resumes where it stopped: nodes off the queue still have no relaxable edge, so the
+        distances do not need to be recomputed and every further cycle costs only the relaxations it needs.
+        """
+        n = len(self.nodes)
+        dst = self.dst
+        epsilon = self.epsilon
+        weight = list(self.weight)
+        outgoing = [[] for _ in range(n)]
+        for edge, src in enumerate(self.src):
+            outgoing[src].append(edge)
+
+        dist = [0.0] * n
+        pred = [-1] * n
+        queue = deque(range(n))
+        queued = [True] * n
+        relaxations = 0
+
+        while queue:
+            u = queue.popleft()
+            queued[u] = False
+            du = dist[u]
+            cycle = None
+
+            for edge in outgoing[u]:
+                v = dst[edge]
+                candidate = du + weight[edge]
+                if candidate < dist[v] - epsilon:
+                    dist[v] = candidate
+                    pred[v] = edge
+                    relaxations += 1
+
+                    if not queued[v]:
+                        queued[v] = True
+                        queue.append(v)
+
+                    if relaxations % n == 0:
+                        cycle = self._predecessor_cycle(pred)
+                        if cycle is not None:
+                            break
+
+            if cycle is None and not queue:
+                cycle = self._predecessor_cycle(pred)
+
+            if cycle is not None:
+                yield cycle
+
+                weakest = max(cycle, key=lambda e: weight[e])
+                weight[weakest] = math.inf
+                pred[dst[weakest]] = -1
+
+                # The scan of u may have been cut short, so its remaining edges are still pending
+                if not queued[u]:
+                    queued[u] = True
+                    queue.appendleft(u)
+
+    def _predecessor_cycle(self, pred):
+        src = self.src
+        visited = [-1] * len(pred)
+
+        for start in range(len(pred)):
+            node = start
+            while node != -1 and visited[node] == -1:
+                visited[node] = start
+                node = src[pred[node]] if pred[node] != -1 else -1
+
+            if node != -1 and visited[node] == start:
+                cycle = []
+                edge = pred[node]
+                while True:
+                    cycle.append(edge)
+                    if src[edge] == node:
+                        break
+                    edge = pred[src[edge]]
+
+                return cycle[::-1]
+
+        return None
+
+
+def fetch_quotes(exchanges):
+    quotes = aio.gather(*(exchange.quotes_async() for exchange in exchanges))
+    return {exchange.name: venue_quotes for exchange, venue_quotes in zip(exchanges, quotes)}
+
+
+def fetch_network_fees():
+    currencies = [currency for currency in Currency if crypto.CryptoWallet.is_crypto(currency)]
+    fees = aio.gather(*(crypto.CryptoWallet.network_fee_async(currency) for currency in currencies))
+    return dict(zip(currencies, fees))
@@ -1,6 +1,9 @@
-import requests
+import time
 from enum import Enum
 
+import transfer.aio as aio
+import transfer.venue as venues
+from transfer.matrix import RateMatrix
 from transfer.oracle import EthereumOracle, BitcoinOracle
 from transfer.institution import Institution, Currency
 
@@ -22,19 +25,84 @@ class ExchangeRate:
 
 
 class CryptoWallet(Institution):
-    api_url = ''
-
     def __init__(self, name):
         super().__init__(name)
+        self._frozen = None
+        self._fetched_at = {}
+
+    def freeze(self, snapshot=None):
+        """
+        Pin online data: from now on rates, prices and fees are fetched once and then answered from memory. Whatever
+        `snapshot` holds is taken from it instead of being fetched.
+        """
+        self._frozen = {}
+
+        if snapshot is not None:
+            for currency, capture in snapshot.fees.items():
+                self._pin(('fee', currency), capture.value + self.withdrawal_fee(currency), capture.captured_at)
+
+    def _pin(self, key, value, fetched_at):
+        self._frozen[key] = value
+        self._fetched_at[key] = fetched_at
+
+    def unfreeze(self):
+        self._frozen = None
+
+    def age(self, key):
+        """Seconds since the frozen value under `key` was fetched, 0.0 if it is not frozen."""
+        if self._frozen is None or key not in self._frozen:
+            return 0.0
 
-    def get_transfer_fee(self, dst_currency):
-        if dst_currency in (Currency.ETH, Currency.DAI, Currency.USDT):
-            return EthereumOracle.fee(dst_currency)
-        elif dst_currency == Currency.BTC:
-            return BitcoinOracle.fee()
+        return time.time() - self._fetched_at[key]
+
+    def _memoize(self, key, fetch):
+        if self._frozen is None:
+            return fetch()
+
+        try:
+            return self._frozen[key]
+        except KeyError:
+            value = self._frozen[key] = fetch()
+            self._fetched_at[key] = time.time()
+            return value
+
+    async def _memoize_async(self, key, fetch):
+        if self._frozen is None:
+            return await fetch()
+
+        try:
+            return self._frozen[key]
+        except KeyError:
+            value = self._frozen[key] = await fetch()
+            self._fetched_at[key] = time.time()
+            return value
+
+    @staticmethod
+    def network_fee(currency):
+        return aio.run(CryptoWallet.network_fee_async(currency))
+
+    @staticmethod
+    async def network_fee_async(currency):
+        if currency in (Currency.ETH, Currency.DAI, Currency.USDT):
+            return await EthereumOracle.fee_async(currency)
+        elif currency == Currency.BTC:
+            return await BitcoinOracle.fee_async()
         else:
             return 0.0
 
+    def withdrawal_fee(self, currency):
+        return getattr(self, f'{currency.value.lower()}_withdrawal_fee', 0.0)
+
+    def get_transfer_fee(self, dst_currency):
+        # A frozen fee is answered from memory without a round trip to the I/O loop
+        return self._memoize(('fee', dst_currency), lambda: aio.run(self._fetch_transfer_fee(dst_currency)))
+
+    async def get_transfer_fee_async(self, dst_currency):
+        return await self._memoize_async(('fee', dst_currency), lambda: self._fetch_transfer_fee(dst_currency))
+
+    async def _fetch_transfer_fee(self, currency):
+        return await self.network_fee_async(currency) + self.withdrawal_fee(currency)
+
     def execute_transfer(self, transfer):
         fee = self.get_transfer_fee(transfer.dst_account.currency)
 
@@ -51,17 +119,39 @@ class CryptoWallet(Institution):
 
 
 class CryptoExchange(CryptoWallet):
+    venue = None    # Name of the venue adapter in venues.yaml
     commission = 0.0
+    _matrix = None
+
+    def freeze(self, snapshot=None):
+        super().freeze(snapshot)
+
+        if snapshot is not None and self.venue in snapshot.venues:
+            capture = snapshot.venues[self.venue]
+            self._pin('quotes', capture.value, capture.captured_at)
 
     def bid_price(self, src_currency, dst_currency):
-        raise NotImplementedError
+        """Amount of dst_currency received for selling one src_currency."""
+        return self.rate_matrix().bid(src_currency, dst_currency, implied=False)
 
     def ask_price(self, src_currency, dst_currency):
-        raise NotImplementedError
+        """Amount of src_currency paid for buying one dst_currency."""
+        return self.rate_matrix().ask(dst_currency, src_currency, implied=False)
+
+    def rate_matrix(self):
+        return self._memoize('matrix', self._refresh_matrix)
+
+    def _refresh_matrix(self):
+        quotes = self.quotes()
+        self._matrix = RateMatrix(quotes) if self._matrix is None else self._matrix.refresh(quotes)
+        return self._matrix
 
-    def get_online_rates(self):
-        response = requests.get(self.api_url)
-        return response.json()
+    def quotes(self):
+        """Return every listed market as {(base, quote): (bid, ask)}, keyed by asset code."""
+        return self._memoize('quotes', lambda: venues.get(self.venue).quotes())
+
+    async def quotes_async(self):
+        return await self._memoize_async('quotes', venues.get(self.venue).quotes_async)
 
     def execute_exchange(self, exchange):
         src_currency = exchange.src_account.currency
@@ -99,131 +189,40 @@ class CryptoExchange(CryptoWallet):
 
 
 class RipioExchange(CryptoExchange):
-    api_url = 'https://app.ripio.com/api/v3/public/rates/?country=AR'
+    venue = 'ripio'
     commission = 0.01
-    available_pairs = [
-        (Currency.BTC, Currency.ARS),
-        (Currency.DAI, Currency.ARS),
-    ]
 
     def __init__(self):
         super(RipioExchange, self).__init__(name='Ripio')
 
-    def rates(self, src_currency, dst_currency):
-        exchange_rates = self.get_online_rates()
-        src, dst = self.get_pair(src_currency, dst_currency)
-        return next(rate for rate in exchange_rates if rate['ticker'] == f'{src.value}_{dst.value}')
-
-    def bid_price(self, src_currency, dst_currency):
-        return float(self.rates(src_currency, dst_currency)['sell_rate'])
-
-    def ask_price(self, src_currency, dst_currency):
-        return float(self.rates(src_currency, dst_currency)['buy_rate'])
-
 
 class LetsBitExchange(CryptoExchange):
-    api_url = 'https://letsbit.io/api/v1/exchange/public/markets/tickers'
+    venue = 'letsbit'
     dai_withdrawal_fee = 5.0
     btc_withdrawal_fee = 0.00025
     usdt_withdrawal_fee = 5.0
     pax_withdrawal_fee = 5.0
-    available_pairs = [
-        (Currency.BTC, Currency.ARS),
-        (Currency.DAI, Currency.ARS),
-        (Currency.USDT, Currency.ARS),
-        (Currency.PAX, Currency.ARS),
-    ]
 
     def __init__(self):
         super(LetsBitExchange, self).__init__(name='LetsBit')
 
-    def rates(self, src_currency, dst_currency):
-        exchange_rates = super(LetsBitExchange, self).get_online_rates()
-        src, dst = self.get_pair(src_currency, dst_currency)
-        return next(rate['ticker'] for key, rate in exchange_rates.items() if key == f'{src.value}{dst.value}'.lower())
-
-    def bid_price(self, src_currency, dst_currency):
-        return float(self.rates(src_currency, dst_currency)['buy'])
-
-    def ask_price(self, src_currency, dst_currency):
-        return float(self.rates(src_currency, dst_currency)['sell'])
-
-    def get_transfer_fee(self, currency):
-        fee = super(LetsBitExchange, self).get_transfer_fee(currency)
-
-        if currency == Currency.DAI:
-            fee += self.dai_withdrawal_fee
-        elif currency == Currency.BTC:
-            fee += self.btc_withdrawal_fee
-        elif currency == Currency.USDT:
-            fee += self.usdt_withdrawal_fee
-        elif currency == Currency.PAX:
-            fee += self.pax_withdrawal_fee
-
-        return fee
-
 
 class BitvavoExchange(CryptoExchange):
-    api_url = 'https://api.bitvavo.com/v2/ticker/book'
+    venue = 'bitvavo'
     commission = 0.0025
-    available_pairs = {
-        (Currency.BTC, Currency.EUR),
-        (Currency.DAI, Currency.EUR),
-        (Currency.USDT, Currency.EUR),
-        # (Currency.PAX, Currency.EUR),     # Does not seem available
-    }
 
     def __init__(self):
         super(BitvavoExchange, self).__init__(name='Bitvavo')
 
-    def rates(self, src_currency, dst_currency):
-        exchange_rates = self.get_online_rates()
-        src, dst = self.get_pair(src_currency, dst_currency)
-        return next(rate for rate in exchange_rates if rate['market'] == f'{src.value}-{dst.value}')
-
-    def bid_price(self, src_currency, dst_currency):
-        return float(self.rates(src_currency, dst_currency)['bid'])
-
-    def ask_price(self, src_currency, dst_currency):
-        return float(self.rates(src_currency, dst_currency)['ask'])
-
 
 class BinanceExchange(CryptoExchange):
-    api_url = 'https://www.binance.com/api/v3/ticker/price'
+    venue = 'binance'
     commission = 0.005
-    available_pairs = {
-        (Currency.BTC, Currency.EUR),
-        (Currency.EUR, Currency.USDT),
-        # (Currency.EUR, Currency.PAX),     # Does not seem available
-        (Currency.DAI, Currency.USDT),
-    }
+    eur_withdrawal_fee = 0.8
 
     def __init__(self):
         super(BinanceExchange, self).__init__(name='Binance')
 
-    def rates(self, src_currency, dst_currency):
-        exchange_rates = self.get_online_rates()
-
-        try:
-            rate = next(rate for rate in exchange_rates if rate['symbol'] == f'{src_currency.value}{dst_currency.value}')   # noqa
-            return float(rate['price'])
-        except StopIteration:
-            rate = next(rate for rate in exchange_rates if rate['symbol'] == f'{dst_currency.value}{src_currency.value}')   # noqa
-            rate = 1.0 / float(rate['price'])
-            return rate
-
-    def bid_price(self, src_currency, dst_currency):
-        return self.rates(src_currency, dst_currency)
-
-    def ask_price(self, src_currency, dst_currency):
-        return self.rates(src_currency, dst_currency)
-
-    def get_transfer_fee(self, dst_currency):
-        if dst_currency == Currency.EUR:
-            return 0.8
-        else:
-            return super(BinanceExchange, self).get_transfer_fee(dst_currency)
-
 
 class MyEtherWallet(CryptoWallet):
     def __init__(self):
@@ -1,16 +1,22 @@
+import transfer.aio as aio
 from crypto.broker import PriceType
+from transfer.snapshot import MarketSnapshot
 
 
 class Customer:
     def want_to_send(self, amount, src_currency, dst_currency, tx_currency, src_broker, dst_broker):
         pass
 
-    def want_to_receive(self, amount, src_currency, dst_currency, tx_currency, src_broker, dst_broker):
+    def want_to_receive(self, amount, src_currency, dst_currency, tx_currency, src_broker, dst_broker, snapshot=None):
         src_broker = src_broker()
         dst_broker = dst_broker()
 
-        src_broker.get_online_rate(src_currency, tx_currency)
-        dst_broker.get_online_rate(tx_currency, dst_currency)
+        # Both legs are priced from one snapshot, taken now unless one is passed in
+        if snapshot is None:
+            snapshot = MarketSnapshot.capture([src_broker.venue, dst_broker.venue], fee_currencies=())
+
+        aio.gather(src_broker.sync_exchange_rate_async(src_currency, tx_currency, snapshot),
+                   dst_broker.sync_exchange_rate_async(tx_currency, dst_currency, snapshot))
 
         # TX-currency to pay at destination
         tx_to_send = dst_broker.sell_to_receive(amount=amount, of_currency=dst_currency, for_currency=tx_currency)
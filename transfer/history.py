@@ -0,0 +1,245 @@
+import bisect
+import os
+
+KEYFRAME = 0
+DELTA = 1
+
+
+def _write_varint(buffer, value):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value // 2 if not value & 1 else -(value + 1) // 2
+
+
+class DeltaEncoder:
+    """
+    Append the successive quotes of one venue to a binary stream, each frame holding only what changed.
+
+    Prices are fixed point with `decimals` decimals. A keyframe holds the pair table and every price; a delta
+    frame holds, for each bid or ask that moved, the gap to the previous changed field and the change of the price,
+    all as zigzag varints. Capture times are in milliseconds and stored as their delta-of-delta, which is zero for
+    polls at a steady pace. A keyframe is written every `keyframe_interval` frames and whenever pairs are listed or
+    delisted, so reading any frame starts from at most that many frames back. Every frame is prefixed by its length
+    to skip it without decoding.
+    """
+
+    def __init__(self, stream, keyframe_interval=100, decimals=8):
+        self.stream = stream
+        self.keyframe_interval = keyframe_interval
+        self.decimals = decimals
+        self.frames = 0
+
+        self._pairs = None
+        self._values = None
+        self._timestamp = self._interval = 0
+
+    def write(self, quotes, captured_at):
+        """Append {(base, quote): (bid, ask)} captured at time.time() `captured_at`. Returns its frame number."""
+        scale = 10 ** self.decimals
+        timestamp = round(captured_at * 1000)
+        pairs = sorted(quotes)
+        values = [round(price * scale) for pair in pairs for price in quotes[pair]]
+
+        if self.frames % self.keyframe_interval == 0 or pairs != self._pairs:
+            self._pairs = pairs
+            frame = self._keyframe(timestamp, values)
+        else:
+            frame = self._delta(timestamp, values)
+
+        self._values = values
+        self.frames += 1
+
+        header = bytearray()
+        _write_varint(header, len(frame))
+        self.stream.write(header + frame)
+        return self.frames - 1
+
+    def _keyframe(self, timestamp, values):
+        frame = bytearray([KEYFRAME])
+        _write_varint(frame, timestamp)
+        _write_varint(frame, self.decimals)
+        _write_varint(frame, len(self._pairs))
+
+        for base, quote in self._pairs:
+            name = f'{base}/{quote}'.encode()
+            _write_varint(frame, len(name))
+            frame += name
+        for value in values:
+            _write_varint(frame, _zigzag(value))
+
+        self._timestamp, self._interval = timestamp, 0
+        return frame
+
+    def _delta(self, timestamp, values):
+        interval = timestamp - self._timestamp
+        frame = bytearray([DELTA])
+        _write_varint(frame, _zigzag(interval - self._interval))
+
+        changes = [(field, value - previous) for field, (value, previous) in enumerate(zip(values, self._values))
+                   if value != previous]
+        _write_varint(frame, len(changes))
+
+        last = -1
+        for field, change in changes:
+            _write_varint(frame, field - last - 1)
+            _write_varint(frame, _zigzag(change))
+            last = field
+
+        self._timestamp, self._interval = timestamp, interval
+        return frame
+
+
+class DeltaDecoder:
+    """
+    Read back a stream written by DeltaEncoder. One pass over the frame lengths indexes every frame and keyframe,
+    so any past frame is rebuilt from its keyframe without decoding what comes before it.
+    """
+
+    def __init__(self, data):
+        self.data = bytes(data)
+        self.offsets = []           # Offset of every frame
+        self.keyframes = []         # Frame number of every keyframe
+        self._index()
+
+    def _index(self):
+        offset = 0
+        while offset < len(self.data):
+            length, start = _read_varint(self.data, offset)
+            if self.data[start] == KEYFRAME:
+                self.keyframes.append(len(self.offsets))
+            self.offsets.append(start)
+            offset = start + length
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        state = None
+        for frame in range(len(self)):
+            state = self._apply(frame, state)
+            yield self._quotes(state)
+
+    def snapshot(self, frame):
+        """Return (captured_at, {(base, quote): (bid, ask)}) of frame number `frame`."""
+        if frame < 0:
+            frame += len(self)
+        if not 0 <= frame < len(self):
+            raise IndexError(f'No frame {frame}')
+
+        state = None
+        for number in range(self.keyframes[bisect.bisect_right(self.keyframes, frame) - 1], frame + 1):
+            state = self._apply(number, state)
+
+        return self._quotes(state)
+
+    def _apply(self, frame, state):
+        data = self.data
+        offset = self.offsets[frame] + 1
+
+        if data[self.offsets[frame]] == KEYFRAME:
+            timestamp, offset = _read_varint(data, offset)
+            decimals, offset = _read_varint(data, offset)
+            count, offset = _read_varint(data, offset)
+
+            pairs = []
+            for _ in range(count):
+                length, offset = _read_varint(data, offset)
+                pairs.append(tuple(data[offset:offset + length].decode().split('/')))
+                offset += length
+
+            values = []
+            for _ in range(count * 2):
+                value, offset = _read_varint(data, offset)
+                values.append(_unzigzag(value))
+
+            return [timestamp, 0, decimals, pairs, values]
+
+        timestamp, interval, decimals, pairs, values = state
+        change, offset = _read_varint(data, offset)
+        interval += _unzigzag(change)
+        count, offset = _read_varint(data, offset)
+
+        values = list(values)
+        field = -1
+        for _ in range(count):
+            gap, offset = _read_varint(data, offset)
+            change, offset = _read_varint(data, offset)
+            field += gap + 1
+            values[field] += _unzigzag(change)
+
+        return [timestamp + interval, interval, decimals, pairs, values]
+
+    @staticmethod
+    def _quotes(state):
+        timestamp, _, decimals, pairs, values = state
+        scale = 10 ** decimals
+
+        return timestamp / 1000, {pair: (values[2 * i] / scale, values[2 * i + 1] / scale)
+                                  for i, pair in enumerate(pairs)}
+
+
+class RateHistory:
+    """
+    Record market snapshots as one delta-encoded stream per venue, in `directory`/<venue>.rates.
+
+    A venue that a snapshot refresh left unchanged shares its quotes with the previous snapshot and is recorded as
+    an empty delta frame, a few bytes holding its capture time.
+    """
+
+    def __init__(self, directory, keyframe_interval=100, decimals=8):
+        self.directory = directory
+        self.keyframe_interval = keyframe_interval
+        self.decimals = decimals
+        self._encoders = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, venue_name):
+        return os.path.join(self.directory, f'{venue_name}.rates')
+
+    def record(self, snapshot):
+        for venue_name, capture in snapshot.venues.items():
+            self._encoder(venue_name).write(capture.value, capture.captured_at)
+
+    def _encoder(self, venue_name):
+        if venue_name not in self._encoders:
+            # A new encoder on an existing file starts with a keyframe, so appending to it stays decodable
+            stream = open(self.path(venue_name), 'ab')
+            self._encoders[venue_name] = DeltaEncoder(stream, self.keyframe_interval, self.decimals)
+
+        return self._encoders[venue_name]
+
+    def flush(self):
+        for encoder in self._encoders.values():
+            encoder.stream.flush()
+
+    def close(self):
+        for encoder in self._encoders.values():
+            encoder.stream.close()
+        self._encoders = {}
+
+    def venue(self, venue_name):
+        """A DeltaDecoder over everything recorded for the venue."""
+        self.flush()
+        with open(self.path(venue_name), 'rb') as history_file:
+            return DeltaDecoder(history_file.read())
@@ -0,0 +1,149 @@
+import numpy as np
+
+from transfer.institution import Account
+from transfer.matrix import CURRENCIES, INDEX
+from transfer.route import Transfer, Exchange, Institution, institutions, freeze_venues
+from transfer.snapshot import MarketSnapshot
+
+
+class BatchLedger:
+    """
+    Balances of every (institution, currency) account, updated by whole batches of transfers and exchanges.
+
+    An operation moves `amount` from a source account to a destination account. Between institutions in the same
+    currency it is a transfer that pays the source's transfer fee; within an institution between currencies it is
+    an exchange at the institution's rate, commission included. Rates and fees are taken once from the institutions
+    through their regular execute_transfer/execute_exchange, so a batch prices exactly like a route would.
+
+    Accounts are numbered institution * len(CURRENCIES) + currency, see account(). Batches are applied in chunks
+    so memory stays bounded whatever the number of operations.
+    """
+
+    chunk_size = 1 << 18
+
+    def __init__(self, venues, initial_balances=None):
+        self.venues = list(venues)
+        self.index = {venue.name: i for i, venue in enumerate(self.venues)}
+        shape = (len(self.venues), len(CURRENCIES))
+
+        self.balances = np.zeros(shape) if initial_balances is None else np.array(initial_balances, dtype=float)
+        self.fees = np.zeros(shape)
+        self.operations = 0
+        self._violations = []
+
+        self._transfer_fees = np.zeros(shape)
+        self._rates = np.full(shape + (len(CURRENCIES),), np.nan)
+        self._commissions = np.array([getattr(venue, 'commission', 0.0) for venue in self.venues])
+        self._price()
+
+    def account(self, venue, currency):
+        """Account number(s) of a venue name and Currency, or of index arrays of both."""
+        if isinstance(venue, str):
+            return self.index[venue] * len(CURRENCIES) + INDEX[currency]
+
+        return np.asarray(venue) * len(CURRENCIES) + np.asarray(currency)
+
+    def _price(self):
+        for i, venue in enumerate(self.venues):
+            for src_currency in CURRENCIES:
+                src_account = Account(venue, src_currency)
+                transfer = Transfer(amount=0.0, src_account=src_account, dst_account=Account(venue, src_currency))
+                self._transfer_fees[i, INDEX[src_currency]] = -transfer.execute()
+
+                for dst_currency in CURRENCIES:
+                    if dst_currency == src_currency:
+                        continue
+
+                    exchange = Exchange(amount=1.0, src_account=src_account, dst_account=Account(venue, dst_currency))
+                    exchange.reverse = False
+                    try:
+                        rate = exchange.execute()
+                    except (NotImplementedError, ValueError):
+                        continue
+
+                    if rate is not None:
+                        self._rates[i, INDEX[src_currency], INDEX[dst_currency]] = rate
+
+    def apply(self, src, dst, amounts):
+        """Apply operations in order. `src` and `dst` are account numbers, `amounts` what leaves the source."""
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=float)
+
+        for start in range(0, len(amounts), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            self._apply(src[chunk], dst[chunk], amounts[chunk])
+
+    def _apply(self, src, dst, amounts):
+        currencies = len(CURRENCIES)
+        src_venue, src_currency = np.divmod(src, currencies)
+        dst_venue, dst_currency = np.divmod(dst, currencies)
+
+        is_transfer = src_currency == dst_currency
+        is_exchange = src_venue == dst_venue
+        rates = self._rates[src_venue, src_currency, dst_currency]
+
+        invalid = (is_transfer == is_exchange) | (is_exchange & np.isnan(rates))
+        if invalid.any():
+            raise ValueError(f'Operation {self.operations + int(np.argmax(invalid))} is neither a transfer between '
+                             f'institutions nor an exchange listed by its institution')
+
+        transfer_fees = self._transfer_fees[src_venue, src_currency]
+        received = np.where(is_transfer, amounts - transfer_fees, amounts * rates)
+        fees = np.where(is_transfer, transfer_fees, amounts * self._commissions[src_venue])
+
+        self._check_balances(src, dst, amounts, received)
+
+        size = self.balances.size
+        self.balances += (np.bincount(dst, weights=received, minlength=size)
+                          - np.bincount(src, weights=amounts, minlength=size)).reshape(self.balances.shape)
+        self.fees += np.bincount(src, weights=fees, minlength=size).reshape(self.fees.shape)
+        self.operations += len(amounts)
+
+    def _check_balances(self, src, dst, amounts, received):
+        """Record every operation after which its source account is overdrawn, replaying the chunk in order."""
+        count = len(amounts)
+        accounts = np.concatenate((src, dst))
+        deltas = np.concatenate((-amounts, received))
+        # The debit of operation k comes before its credit, and both after everything of operation k - 1
+        events = np.concatenate((np.arange(count) * 2, np.arange(count) * 2 + 1))
+
+        order = np.lexsort((events, accounts))
+        accounts, deltas, events = accounts[order], deltas[order], events[order]
+
+        running = np.cumsum(deltas)
+        starts = np.flatnonzero(np.r_[True, accounts[1:] != accounts[:-1]])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(accounts)]))
+        running += self.balances.ravel()[accounts] - (running[group_start] - deltas[group_start])
+
+        # Only debits: a transfer smaller than its fee credits a negative amount, which is not an overdraft
+        overdrawn = (running < -1e-9) & (events % 2 == 0)
+        self._violations.append(self.operations + np.unique(events[overdrawn] // 2))
+
+    def violations(self):
+        """Indices of the operations that overdrew their source account."""
+        return np.concatenate(self._violations) if self._violations else np.empty(0, dtype=np.int64)
+
+    def report(self):
+        def by_account(values):
+            return {
+                (self.venues[i].name, CURRENCIES[c].value): float(values[i, c])
+                for i, c in zip(*np.nonzero(values))
+            }
+
+        return {
+            'operations': self.operations,
+            'balances': by_account(self.balances),
+            'fees': by_account(self.fees),
+            'violations': len(self.violations()),
+        }
+
+
+def build_ledger(initial_balances=None, snapshot=None):
+    """A ledger over every institution routes can use, priced from `snapshot`, captured here if not given."""
+    venues = [institutions[institution]() for institution in Institution]
+    if snapshot is None:
+        snapshot = MarketSnapshot.capture({venue.venue for venue in venues if getattr(venue, 'venue', None)})
+    freeze_venues(venues, snapshot)
+
+    return BatchLedger(venues, initial_balances)
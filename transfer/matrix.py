@@ -0,0 +1,123 @@
+import numpy as np
+
+from transfer.constants import Currency
+
+CURRENCIES = list(Currency)
+INDEX = {currency: i for i, currency in enumerate(CURRENCIES)}
+CODES = {currency.value: currency for currency in CURRENCIES}
+
+# Currencies through which a missing pair is implied, in order of preference
+PIVOTS = (Currency.USDT, Currency.BTC, Currency.USD)
+
+
+class RateMatrix:
+    """
+    Bid and ask prices between every pair of currencies on one venue, for one snapshot of its tickers.
+
+    bids[i, j] is what one unit of currency i sells for in currency j, asks[i, j] what it costs to buy one. Both
+    directions of a listed market are stored, so no lookup needs to know how the venue orders its pairs. Pairs the
+    venue does not list are implied through a pivot currency and flagged in `synthetic`.
+    """
+
+    def __init__(self, quotes=None):
+        """:param quotes: {(base, quote): (bid, ask)} keyed by asset code, as returned by CryptoExchange.quotes."""
+        n = len(CURRENCIES)
+        self.quotes = {}
+        self._direct_bid = np.full((n, n), np.nan)
+        self._direct_ask = np.full((n, n), np.nan)
+        np.fill_diagonal(self._direct_bid, 1.0)
+        np.fill_diagonal(self._direct_ask, 1.0)
+
+        self._set_quotes(quotes or {})
+        self.bids = self._direct_bid.copy()
+        self.asks = self._direct_ask.copy()
+        self.synthetic = np.zeros((n, n), dtype=bool)
+        self._imply(range(n))
+
+    def refresh(self, quotes):
+        """
+        Return the matrix for a new snapshot of the same venue. Only the rows and columns of currencies whose
+        tickers changed are recomputed; if nothing changed, the matrix itself is returned.
+        """
+        quotes = {pair: quote for pair, quote in quotes.items() if self._is_known(pair)}
+        changed = {pair: quote for pair, quote in quotes.items() if self.quotes.get(pair) != quote}
+        removed = [pair for pair in self.quotes if pair not in quotes]
+
+        if not changed and not removed:
+            return self
+
+        matrix = RateMatrix.__new__(RateMatrix)
+        matrix.quotes = dict(self.quotes)
+        matrix._direct_bid = self._direct_bid.copy()
+        matrix._direct_ask = self._direct_ask.copy()
+        matrix.bids = self.bids.copy()
+        matrix.asks = self.asks.copy()
+        matrix.synthetic = self.synthetic.copy()
+
+        for base, quote in removed:
+            del matrix.quotes[(base, quote)]
+            i, j = INDEX[CODES[base]], INDEX[CODES[quote]]
+            matrix._direct_bid[[i, j], [j, i]] = np.nan
+            matrix._direct_ask[[i, j], [j, i]] = np.nan
+
+        matrix._set_quotes(changed)
+        matrix._imply({INDEX[CODES[code]] for pair in list(changed) + removed for code in pair})
+
+        return matrix
+
+    def bid(self, base, quote, implied=True):
+        return self._lookup(self.bids, base, quote, implied)
+
+    def ask(self, base, quote, implied=True):
+        return self._lookup(self.asks, base, quote, implied)
+
+    def is_synthetic(self, base, quote):
+        return bool(self.synthetic[INDEX[base], INDEX[quote]])
+
+    def _lookup(self, prices, base, quote, implied):
+        i, j = INDEX[base], INDEX[quote]
+        price = prices[i, j]
+
+        if np.isnan(price) or (not implied and self.synthetic[i, j]):
+            raise ValueError(f'No rate between {base.value} and {quote.value}')
+
+        return float(price)
+
+    @staticmethod
+    def _is_known(pair):
+        return pair[0] in CODES and pair[1] in CODES
+
+    def _set_quotes(self, quotes):
+        for (base, quote), (bid, ask) in quotes.items():
+            if not self._is_known((base, quote)):
+                continue
+
+            self.quotes[(base, quote)] = (bid, ask)
+            i, j = INDEX[CODES[base]], INDEX[CODES[quote]]
+            self._direct_bid[i, j], self._direct_ask[i, j] = bid, ask
+            self._direct_bid[j, i], self._direct_ask[j, i] = 1.0 / ask, 1.0 / bid
+
+    def _imply(self, affected):
+        """Recompute every price in the rows and columns of the affected currencies."""
+        affected = np.fromiter(sorted(affected), dtype=int)
+        everything = np.arange(len(CURRENCIES))
+
+        for rows, columns in ((affected, everything), (everything, affected)):
+            cells = np.ix_(rows, columns)
+            bid = self._direct_bid[cells]
+            ask = self._direct_ask[cells]
+            synthetic = np.zeros(bid.shape, dtype=bool)
+
+            for pivot in (INDEX[currency] for currency in PIVOTS):
+                # Selling i for the pivot and the pivot for j; buying i with the pivot, bought with j
+                implied_bid = np.outer(self._direct_bid[rows, pivot], self._direct_bid[pivot, columns])
+                implied_ask = np.outer(self._direct_ask[rows, pivot], self._direct_ask[pivot, columns])
+                fill = np.isnan(bid) & ~np.isnan(implied_bid)
+
+                bid[fill] = implied_bid[fill]
+                ask[fill] = implied_ask[fill]
+                synthetic |= fill
+
+            self.bids[cells] = bid
+            self.asks[cells] = ask
+            self.synthetic[cells] = synthetic
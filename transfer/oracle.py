@@ -1,6 +1,8 @@
-import requests
+import asyncio
 
+import transfer.aio as aio
 from transfer.constants import Currency, SATOSHI
+from transfer.matrix import RateMatrix
 
 
 class CryptoOracle:
@@ -9,19 +11,19 @@ class CryptoOracle:
 
     @staticmethod
     def exchange_rate(src_currency, dst_currency):
-        prices = CryptoOracle._get_prices()
+        return aio.run(CryptoOracle.exchange_rate_async(src_currency, dst_currency))
 
-        if dst_currency == Currency.USD:
-            return prices[src_currency.value]
-        elif src_currency == Currency.USD:
-            return 1.0 / prices[dst_currency.value]
-        else:
-            return prices[src_currency] / prices[dst_currency.value]
+    @staticmethod
+    async def exchange_rate_async(src_currency, dst_currency):
+        prices = await CryptoOracle._get_prices_async()
+        usd_quotes = {(symbol, Currency.USD.value): (price, price) for symbol, price in prices.items() if price > 0.0}
+
+        return RateMatrix(usd_quotes).bid(src_currency, dst_currency)
 
     @staticmethod
-    def _get_prices():
+    async def _get_prices_async():
         url = f'{CryptoOracle.api_url}/coins'
-        coins = requests.get(url=url, headers={'x-access-token': CryptoOracle.coinrank_api_key}).json()
+        coins = await aio.get_json(url, headers={'x-access-token': CryptoOracle.coinrank_api_key})
 
         return {coin['symbol']: float(coin['price']) for coin in coins['data']['coins']}
 
@@ -31,16 +33,24 @@ class BitcoinOracle(CryptoOracle):
 
     @staticmethod
     def fee(inputs=1, outputs=2, priority=True):
+        return aio.run(BitcoinOracle.fee_async(inputs, outputs, priority))
+
+    @staticmethod
+    async def fee_async(inputs=1, outputs=2, priority=True):
         transaction_size_bytes = (inputs * 148) + (outputs * 34) + 10 + inputs
 
-        fees = requests.get(BitcoinOracle.fee_url).json()
+        fees = await aio.get_json(BitcoinOracle.fee_url)
         fee_in_satoshis = fees['priority'] if priority else fees['regular']
 
         return (fee_in_satoshis * transaction_size_bytes) * SATOSHI
 
     @staticmethod
     def exchange_rate(dst_currency=Currency.USD):
-        return CryptoOracle.exchange_rate(src_currency=Currency.BTC, dst_currency=dst_currency)
+        return aio.run(BitcoinOracle.exchange_rate_async(dst_currency))
+
+    @staticmethod
+    async def exchange_rate_async(dst_currency=Currency.USD):
+        return await CryptoOracle.exchange_rate_async(src_currency=Currency.BTC, dst_currency=dst_currency)
 
 
 class EthereumOracle:
@@ -48,13 +58,18 @@ class EthereumOracle:
 
     @staticmethod
     def fee(expressed_in=Currency.ETH):
-        fees = requests.get(EthereumOracle.fee_url).json()
-        fee = fees['chart_data'][0][0]['last_value']
+        return aio.run(EthereumOracle.fee_async(expressed_in))
 
+    @staticmethod
+    async def fee_async(expressed_in=Currency.ETH):
         if expressed_in == Currency.USD:
-            return fee
+            fees = await aio.get_json(EthereumOracle.fee_url)
+            return fees['chart_data'][0][0]['last_value']
         elif expressed_in in (Currency.ETH, Currency.DAI, Currency.USDT):
-            rate = CryptoOracle.exchange_rate(src_currency=expressed_in, dst_currency=Currency.USD)
-            return fee / rate
+            # The fee and the rate to convert it come from different services, so both are fetched at once
+            fees, rate = await asyncio.gather(
+                aio.get_json(EthereumOracle.fee_url),
+                CryptoOracle.exchange_rate_async(src_currency=expressed_in, dst_currency=Currency.USD))
+            return fees['chart_data'][0][0]['last_value'] / rate
         else:
             raise ValueError
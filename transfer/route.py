@@ -1,14 +1,17 @@
 from enum import Enum
 
+import transfer.aio as aio
 import transfer.crypto as crypto
 import transfer.bank as bank
 from transfer.constants import Currency
+from transfer.solver import InverseSolver
 
 
 class Route:
     def __init__(self):
         self._nodes = []
         self._transactions = []
+        self._solver = None
 
     def add_node(self, account):
         self._nodes.append(account)
@@ -22,32 +25,72 @@ class Route:
             else:
                 self._transactions.append(Exchange(src_account=src_account, dst_account=dst_account))
 
-    def send(self, amount):
+    def send(self, amount, verbose=True):
         self._transactions[0].amount = amount
 
         for i, tx in enumerate(self._transactions, start=1):
             tx.reverse = False
             amount_transferred = tx.execute()
-            print(f'{tx}: {amount_transferred}')
+            if verbose:
+                print(f'{tx}: {amount_transferred}')
 
             try:
                 self._transactions[i].amount = amount_transferred
             except IndexError:
                 return amount_transferred
 
-    def receive(self, amount):
+    def linearize(self):
+        """
+        Return (transaction, rate, fee) per hop, such that the hop sends `rate * amount - fee` onwards.
+
+        Every hop is linear plus a constant fee, so executing it for 0 and 1 gives both coefficients.
+        """
+        hops = []
+
+        for tx in self._transactions:
+            tx.reverse = False
+            tx.amount = 0.0
+            fee = -tx.execute()
+            tx.amount = 1.0
+            rate = tx.execute() + fee
+            hops.append((tx, rate, fee))
+
+        return hops
+
+    def receive(self, amount, verbose=True):
         self._transactions[-1].amount = amount
 
         for i, tx in enumerate(reversed(self._transactions), start=2):
             tx.reverse = True
             amount_transferred = tx.execute()
-            print(f'{tx}: {amount_transferred}')
+            if verbose:
+                print(f'{tx}: {amount_transferred}')
 
             try:
                 self._transactions[-i].amount = amount_transferred
             except IndexError:
                 return amount_transferred
 
+    def solve_receive(self, amount, tolerance=1e-6):
+        """
+        Source amount needed to receive `amount`, solved numerically from send() instead of inverting every hop.
+
+        Unlike receive() this holds for hops without a closed-form inverse. The solver is kept with the route, so
+        quoting it again starts from the previous solution. Returns a Solution.
+        """
+        if self._solver is None:
+            self._solver = InverseSolver(lambda source_amount: self.send(source_amount, verbose=False))
+        self._solver.tolerance = tolerance
+
+        return self._solver.solve(amount)
+
+    @property
+    def currencies(self):
+        return self._nodes[0].currency, self._nodes[-1].currency
+
+    def __str__(self):
+        return ' > '.join(node.name for node in self._nodes)
+
 
 class Transfer:
     def __init__(self, amount=0.0, src_account=None, dst_account=None):
@@ -110,14 +153,64 @@ institutions = {
 }
 
 
-def process_route(direction, amount, hops):
+def build_route(hops, venues=None):
+    """Build a route from its hops. Pass the same `venues` dict to share institution instances across routes."""
+    venues = {} if venues is None else venues
     route = Route()
 
     for hop in hops:
-        institution = institutions[Institution(hop["institution"])]()
-        account = institution.create_account(Currency(hop["currency"]))
+        institution = Institution(hop["institution"])
+        if institution not in venues:
+            venues[institution] = institutions[institution]()
+
+        account = venues[institution].create_account(Currency(hop["currency"]))
         route.add_node(account)
 
+    return route
+
+
+def build_frozen_routes(route_configs, snapshot=None):
+    """
+    Build the routes of a route set on shared institutions, frozen so that every evaluation of every route is
+    priced from the same data. The quotes of all exchanges are fetched once and concurrently, unless they are in
+    `snapshot`.
+    """
+    venues = {}
+    routes = [build_route(config['hops'], venues) for config in route_configs]
+    freeze_venues(venues.values(), snapshot)
+
+    return routes
+
+
+def route_venues(route_configs):
+    """Names of the venue adapters the routes of a route set read quotes from."""
+    classes = {institutions[Institution(hop['institution'])] for config in route_configs for hop in config['hops']}
+
+    return {cls.venue for cls in classes if getattr(cls, 'venue', None) is not None}
+
+
+def freeze_venues(venues, snapshot=None):
+    """Freeze the crypto venues among `venues` on `snapshot`, fetching the quotes it lacks for all exchanges at once."""
+    venues = list(venues)
+
+    for venue in venues:
+        if isinstance(venue, crypto.CryptoWallet):
+            venue.freeze(snapshot)
+
+    aio.gather(*(venue.quotes_async() for venue in venues if isinstance(venue, crypto.CryptoExchange)))
+
+
+def process_route(direction, amount, hops, capacity=None, snapshot=None):
+    """
+    Price a route. With a MarketSnapshot, every hop is priced from it rather than from its own fetch. `capacity` is
+    only used when splitting an amount over several routes, see allocate_routes.
+    """
+    venues = {}
+    route = build_route(hops, venues)
+
+    if snapshot is not None:
+        freeze_venues(venues.values(), snapshot)
+
     if Direction(direction) == Direction.SEND:
         reciprocal_amount = route.send(amount)
         effective_rate = amount / reciprocal_amount
@@ -0,0 +1,202 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from transfer.constants import Currency
+from transfer.crypto import CryptoWallet
+from transfer.route import Exchange, Direction, build_frozen_routes, route_venues
+from transfer.simulation import VOLATILITIES, YEAR
+from transfer.snapshot import MarketSnapshot
+
+# Annualised volatility of network fees, relative to the fee (mempool fees easily move ~40% within an hour)
+NETWORK_FEE_VOLATILITY = 40.0
+
+# Relative difference between two routes below which the choice between them is considered a toss-up
+MIN_MARGIN = 1e-4
+
+
+@dataclass
+class Input:
+    source: str             # What to refresh to update the input: a venue or an oracle
+    name: str
+    value: float
+    volatility: float       # Annualised, relative to the value. Zero for inputs that do not move, like commissions.
+    age: float              # Seconds since the value was fetched
+    hop: int
+    d_rate: float = 0.0     # Derivative of the hop's rate with respect to the input
+    d_fee: float = 0.0      # Derivative of the hop's fee with respect to the input
+
+    @property
+    def expected_move(self):
+        return self.value * self.volatility * math.sqrt(self.age / YEAR)
+
+
+@dataclass
+class Sensitivity:
+    route: str
+    input: Input
+    effective_rate: float
+    derivative: float       # d effective_rate / d input
+
+    @property
+    def elasticity(self):
+        """Relative change of the effective rate for a relative change of the input."""
+        return self.derivative * self.input.value / self.effective_rate
+
+    def __str__(self):
+        return f'{self.route} | [{self.input.source}] {self.input.name}: {self.derivative:+.6g} ' \
+               f'(elasticity {self.elasticity:+.6g})'
+
+
+class SensitivityAnalysis:
+    """
+    Sensitivity of every route's effective rate to every quote and fee it depends on.
+
+    Each route is linear plus a constant fee per hop (see Route.linearize), so it delivers
+    a_k = a_(k-1) * r_k - f_k. With S_k the product of the rates after hop k, the output moves by a_(k-1) * S_k per
+    unit of r_k and by -S_k per unit of f_k. Routes are padded into one array so the chain, its suffix products and
+    all derivatives come out of a single vectorised pass over the hops.
+    """
+
+    def __init__(self, routes, amounts, volatilities=None):
+        self.routes = routes
+        self.amounts = np.asarray(amounts, dtype=float)
+        self.volatilities = {**VOLATILITIES, **(volatilities or {})}
+        self.inputs = []
+        self._compile()
+        self._differentiate()
+
+    def _compile(self):
+        chains = [route.linearize() for route in self.routes]
+        hops = max(len(chain) for chain in chains)
+
+        self.rates = np.ones((len(chains), hops))
+        self.fees = np.zeros((len(chains), hops))
+
+        for i, chain in enumerate(chains):
+            inputs = []
+            for k, (tx, rate, fee) in enumerate(chain):
+                self.rates[i, k] = rate
+                self.fees[i, k] = fee
+                inputs.extend(self._hop_inputs(k, tx, rate, fee))
+            self.inputs.append(inputs)
+
+    def _hop_inputs(self, k, tx, rate, fee):
+        institution = tx.executing_institution
+        src_currency = tx.src_account.currency
+        dst_currency = tx.dst_account.currency
+
+        if isinstance(tx, Exchange):
+            if institution.is_crypto(dst_currency):
+                price = institution.ask_price(src_currency, dst_currency)
+                pair, side, d_rate = (dst_currency, src_currency), 'ask', -rate / price
+            else:
+                price = institution.bid_price(src_currency, dst_currency)
+                pair, side, d_rate = (src_currency, dst_currency), 'bid', rate / price
+
+            volatility = math.hypot(self.volatilities.get(pair[0], 0.0), self.volatilities.get(pair[1], 0.0))
+            yield Input(institution.name, f'{pair[0].value}/{pair[1].value} {side}', price, volatility,
+                        institution.age('quotes'), k, d_rate=d_rate)
+            yield Input(institution.name, 'commission', institution.commission, 0.0, 0.0, k,
+                        d_rate=-rate / (1.0 - institution.commission))
+
+        elif isinstance(institution, CryptoWallet) and fee:
+            withdrawal_fee = institution.withdrawal_fee(dst_currency)
+            network_fee = fee - withdrawal_fee
+            oracle = 'BitcoinOracle' if dst_currency == Currency.BTC else 'EthereumOracle'
+
+            if network_fee:
+                yield Input(oracle, f'{dst_currency.value} network fee', network_fee, NETWORK_FEE_VOLATILITY,
+                            institution.age(('fee', dst_currency)), k, d_fee=1.0)
+            if withdrawal_fee:
+                yield Input(institution.name, f'{dst_currency.value} withdrawal fee', withdrawal_fee, 0.0, 0.0, k,
+                            d_fee=1.0)
+
+    def _differentiate(self):
+        routes, hops = self.rates.shape
+
+        # received[:, k] is the amount entering hop k
+        received = np.empty((routes, hops + 1))
+        received[:, 0] = self.amounts
+        for k in range(hops):
+            received[:, k + 1] = received[:, k] * self.rates[:, k] - self.fees[:, k]
+
+        suffix = np.ones((routes, hops))
+        for k in range(hops - 2, -1, -1):
+            suffix[:, k] = suffix[:, k + 1] * self.rates[:, k + 1]
+
+        self.received = received[:, -1]
+        self.effective_rates = self.amounts / self.received
+
+        d_effective_rate = -self.amounts / self.received ** 2
+        self.d_rates = (received[:, :-1] * suffix) * d_effective_rate[:, None]
+        self.d_fees = -suffix * d_effective_rate[:, None]
+
+    def sensitivities(self):
+        return [Sensitivity(str(self.routes[i]), item, float(self.effective_rates[i]), float(derivative))
+                for i, item, derivative in self._derivatives()]
+
+    def _derivatives(self):
+        """
+        Derivative of every route's effective rate per input. An input paid on several hops, like the network fee
+        of a currency moved twice, is one input whose derivative is the sum over those hops.
+        """
+        for i, inputs in enumerate(self.inputs):
+            grouped = {}
+            for item in inputs:
+                derivative = self.d_rates[i, item.hop] * item.d_rate + self.d_fees[i, item.hop] * item.d_fee
+                key = (item.source, item.name)
+                if key in grouped:
+                    grouped[key][1] += derivative
+                else:
+                    grouped[key] = [item, derivative]
+
+            for item, derivative in grouped.values():
+                yield i, item, derivative
+
+    def margins(self):
+        """Relative distance of every route's effective rate to the best alternative for the same currencies."""
+        margins = np.ones(len(self.routes))
+
+        for i, route in enumerate(self.routes):
+            others = [self.effective_rates[j] for j, other in enumerate(self.routes)
+                      if j != i and other.currencies == route.currencies]
+            if others:
+                margins[i] = max(abs(self.effective_rates[i] - min(others)) / self.effective_rates[i], MIN_MARGIN)
+
+        return margins
+
+    def priorities(self):
+        """
+        Rank what to refresh first. Every input scores the relative change of the effective rate expected from the
+        age of its value, scaled up for routes that are close to another route and could swap places. A source
+        scores the most any of its inputs does.
+        """
+        margins = self.margins()
+        scores = {}
+
+        for i, item, derivative in self._derivatives():
+            score = abs(derivative) * item.expected_move / self.effective_rates[i] / margins[i]
+            scores[item.source] = max(scores.get(item.source, 0.0), score)
+
+        return sorted(((source, float(score)) for source, score in scores.items()), key=lambda item: item[1],
+                      reverse=True)
+
+
+def analyze_routes(route_configs, volatilities=None, snapshot=None):
+    """
+    Sensitivities of the routes of routes.yaml, priced from `snapshot` (e.g. a MarketFeed's current one) or one
+    captured here. Inputs are as old as their capture in the snapshot.
+    """
+    if snapshot is None:
+        snapshot = MarketSnapshot.capture(route_venues(route_configs))
+
+    routes = build_frozen_routes(route_configs, snapshot)
+    amounts = [
+        route.receive(config['amount'], verbose=False)
+        if Direction(config['direction']) == Direction.RECEIVE else config['amount']
+        for config, route in zip(route_configs, routes)
+    ]
+
+    return SensitivityAnalysis(routes, amounts, volatilities)
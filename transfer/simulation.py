@@ -0,0 +1,124 @@
+import math
+
+import numpy as np
+
+from transfer.constants import Currency
+from transfer.route import Transfer, Direction, build_frozen_routes, route_venues
+from transfer.snapshot import MarketSnapshot
+
+YEAR = 365.0 * 24 * 60 * 60
+
+# Time in seconds until a transfer in that currency is credited at the destination
+SETTLEMENT_TIMES = {
+    Currency.BTC: 60.0 * 60,        # ~6 confirmations
+    Currency.ETH: 5.0 * 60,
+    Currency.DAI: 5.0 * 60,
+    Currency.USDT: 5.0 * 60,
+    Currency.PAX: 5.0 * 60,
+}
+
+# Annualised volatility of each currency against USD. Anything missing is treated as stable.
+VOLATILITIES = {
+    Currency.BTC: 0.65,
+    Currency.ETH: 0.8,
+    Currency.DAI: 0.01,
+    Currency.USDT: 0.01,
+    Currency.PAX: 0.01,
+}
+
+
+def volatility_from_history(timestamps, prices):
+    """Annualised volatility of a recorded rate history, from its log returns. Timestamps are in seconds."""
+    timestamps = np.asarray(timestamps, dtype=float)
+    returns = np.diff(np.log(np.asarray(prices, dtype=float)))
+    elapsed = np.diff(timestamps)
+
+    return math.sqrt(np.sum(returns ** 2) / np.sum(elapsed) * YEAR)
+
+
+class SettlementSimulator:
+    """
+    Simulate what a route really delivers when prices keep moving while transfers settle.
+
+    Each currency's USD price follows a driftless geometric Brownian motion. An exchange executed after the
+    preceding transfers have settled converts at its quoted rate, scaled by how much the two currencies moved
+    relative to each other meanwhile. Exchanges of the same currency later in the route continue the same price
+    path. All paths are simulated at once, as arrays.
+    """
+
+    def __init__(self, volatilities=None, settlement_times=None, paths=100_000, seed=None):
+        self.volatilities = {**VOLATILITIES, **(volatilities or {})}
+        self.settlement_times = {**SETTLEMENT_TIMES, **(settlement_times or {})}
+        self.paths = paths
+        self.rng = np.random.default_rng(seed)
+
+    def simulate(self, route, amount):
+        """Return the amount received on every path when sending `amount` through `route`."""
+        amounts = np.full(self.paths, float(amount))
+        log_prices = {}
+        elapsed = 0.0
+
+        for tx, rate, fee in route.linearize():
+            src_currency = tx.src_account.currency
+            dst_currency = tx.dst_account.currency
+
+            if isinstance(tx, Transfer):
+                amounts *= rate
+                elapsed += self.settlement_times.get(dst_currency, 0.0)
+            else:
+                drift = (self._log_price(log_prices, src_currency, elapsed)
+                         - self._log_price(log_prices, dst_currency, elapsed))
+                amounts *= rate * np.exp(drift)
+
+            amounts -= fee
+            np.maximum(amounts, 0.0, out=amounts)
+
+        return amounts
+
+    def _log_price(self, log_prices, currency, time):
+        volatility = self.volatilities.get(currency, 0.0)
+        if volatility == 0.0 or time == 0.0:
+            return 0.0
+
+        last_time, log_price = log_prices.get(currency, (0.0, 0.0))
+        if time > last_time:
+            variance = volatility ** 2 * (time - last_time) / YEAR
+            log_price = log_price + math.sqrt(variance) * self.rng.standard_normal(self.paths) - 0.5 * variance
+            log_prices[currency] = (time, log_price)
+
+        return log_price
+
+    def summarize(self, route, amount):
+        received = self.simulate(route, amount)
+        p5, p95 = np.percentile(received, [5, 95])
+
+        return {
+            'quoted': route.send(amount, verbose=False),
+            'mean': float(received.mean()),
+            'p5': float(p5),
+            'p95': float(p95),
+            'worst': float(received.min()),
+        }
+
+
+def simulate_routes(route_configs, paths=100_000, volatilities=None, settlement_times=None, seed=None,
+                    snapshot=None):
+    """
+    Distribution of the amount received for every route of routes.yaml. For receive routes the source amount
+    that is quoted for the requested amount is sent, so the results show what actually arrives instead. All routes
+    start from `snapshot`, captured here if not given.
+    """
+    if snapshot is None:
+        snapshot = MarketSnapshot.capture(route_venues(route_configs))
+
+    simulator = SettlementSimulator(volatilities, settlement_times, paths, seed)
+    results = []
+
+    for config, route in zip(route_configs, build_frozen_routes(route_configs, snapshot)):
+        amount = config['amount']
+        if Direction(config['direction']) == Direction.RECEIVE:
+            amount = route.receive(amount, verbose=False)
+
+        results.append({'route': str(route), 'amount': amount, **simulator.summarize(route, amount)})
+
+    return results
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+import transfer.aio as aio
+import transfer.venue as venues
+from transfer.constants import Currency
+from transfer.crypto import CryptoWallet
+
+# Currencies whose network fee is published by an oracle
+FEE_CURRENCIES = (Currency.BTC, Currency.ETH, Currency.DAI, Currency.USDT)
+
+
+@dataclass(frozen=True)
+class Capture:
+    value: object           # {(base, quote): (bid, ask)} of a venue, read-only, or the network fee of a currency
+    captured_at: float      # time.time() of the fetch
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    The tickers of a set of venues and the network fees of a set of currencies, fetched together and never changed.
+
+    Everything priced from one snapshot sees the same market, whatever the number of routes or threads, and a
+    snapshot is shared as is: its mappings are read-only views. refresh() returns a new snapshot instead, copied on
+    write: a venue whose tickers did not change keeps the very same mapping, so a refresh only costs memory for
+    what moved. Only the top of the book is captured, the venue endpoints publish no depth.
+    """
+
+    venues: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))    # Venue name -> Capture
+    fees: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))      # Currency -> Capture
+    captured_at: float = 0.0
+
+    @classmethod
+    def capture(cls, venue_names=None, fee_currencies=FEE_CURRENCIES):
+        return aio.run(cls.capture_async(venue_names, fee_currencies))
+
+    @classmethod
+    async def capture_async(cls, venue_names=None, fee_currencies=FEE_CURRENCIES):
+        """
+        Fetch every venue in `venue_names` (all of venues.yaml by default) and every fee at once. Those that fail
+        are left out.
+        """
+        return await cls().refresh_async(venue_names, fee_currencies)
+
+    def refresh(self, venue_names=None, fee_currencies=FEE_CURRENCIES):
+        return aio.run(self.refresh_async(venue_names, fee_currencies))
+
+    async def refresh_async(self, venue_names=None, fee_currencies=FEE_CURRENCIES):
+        venue_names = list(venues.VENUES if venue_names is None else venue_names)
+        fee_currencies = list(fee_currencies)
+
+        results = await asyncio.gather(*(venues.get(name).quotes_async() for name in venue_names),
+                                       *(CryptoWallet.network_fee_async(currency) for currency in fee_currencies),
+                                       return_exceptions=True)
+
+        # A venue or oracle that fails keeps its previous capture, whose captured_at shows how stale it is
+        quotes = {name: result for name, result in zip(venue_names, results) if not isinstance(result, Exception)}
+        fees = {currency: result for currency, result in zip(fee_currencies, results[len(venue_names):])
+                if not isinstance(result, Exception)}
+
+        return self.replace(quotes, fees)
+
+    def replace(self, venue_quotes=None, fees=None, captured_at=None):
+        """A new snapshot with the given venues' quotes and fees, sharing every unchanged entry with this one."""
+        captured_at = time.time() if captured_at is None else captured_at
+
+        captures = dict(self.venues)
+        for name, quotes in (venue_quotes or {}).items():
+            previous = captures.get(name)
+            if previous is None or previous.value != quotes:
+                quotes = MappingProxyType(dict(quotes))
+            else:
+                quotes = previous.value
+            captures[name] = Capture(quotes, captured_at)
+
+        fee_captures = dict(self.fees)
+        for currency, fee in (fees or {}).items():
+            fee_captures[currency] = Capture(fee, captured_at)
+
+        return MarketSnapshot(MappingProxyType(captures), MappingProxyType(fee_captures), captured_at)
+
+    def quotes(self, venue_name):
+        return self.venues[venue_name].value
+
+    def fee(self, currency):
+        return self.fees[currency].value
+
+    def age(self):
+        """Seconds since the oldest value in the snapshot was fetched."""
+        oldest = min((item.captured_at for item in (*self.venues.values(), *self.fees.values())), default=time.time())
+        return time.time() - oldest
+
+
+class MarketFeed:
+    """
+    Publish the latest snapshot. Readers take `snapshot` and keep using that object; refresh() swaps in a new one,
+    so nothing a reader holds ever changes underneath it. Every snapshot is recorded to `history`, a RateHistory,
+    if one is given.
+    """
+
+    def __init__(self, venue_names=None, fee_currencies=FEE_CURRENCIES, history=None):
+        self.venue_names = venue_names
+        self.fee_currencies = fee_currencies
+        self.history = history
+        self.snapshot = MarketSnapshot()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            self.snapshot = self.snapshot.refresh(self.venue_names, self.fee_currencies)
+            if self.history is not None:
+                self.history.record(self.snapshot)
+
+        return self.snapshot
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class Solution:
+    amount: float           # Source amount to send
+    received: float         # What that amount delivers at the destination
+    evaluations: int        # Forward evaluations it took
+    converged: bool
+
+
+class InverseSolver:
+    """
+    Find the source amount a route needs to deliver a target amount, from nothing but its forward evaluation.
+
+    `forward` maps a source amount to the destination amount and only has to be non-decreasing, so hops with
+    depth-based prices or tiered fees, which have no closed-form inverse, are solved like linear ones. Every step
+    is a Newton step on the latest secant slope. Points falling short of the target and points reaching it bracket
+    the solution; a step leaving the bracket, or one that fails to halve it, is followed by bisection, and the
+    bracket is grown geometrically until it exists. The solver is done when the destination amount is within
+    `tolerance` of the target. When the forward function jumps over the target, as with a fee tier, it is done when
+    the bracket closes and returns the smallest amount that reaches the target.
+
+    The last solution and slope are kept, so the next solve starts from a Newton step off the previous solution.
+    Quoting the same route repeatedly while prices move then takes two or three evaluations; a linear route is
+    solved exactly by the first secant.
+    """
+
+    def __init__(self, forward, tolerance=1e-6, max_evaluations=60):
+        self.forward = forward
+        self.tolerance = tolerance
+        self.max_evaluations = max_evaluations
+
+        self._amount = None
+        self._received = None
+        self._slope = None
+
+    def reset(self):
+        self._amount = self._received = self._slope = None
+
+    def solve(self, target):
+        evaluations = 0
+        below = above = None    # (amount, error) of the closest points short of and reaching the target
+
+        def evaluate(amount):
+            nonlocal evaluations, below, above
+            evaluations += 1
+            error = self.forward(amount) - target
+
+            if error < 0.0:
+                if below is None or amount > below[0]:
+                    below = (amount, error)
+            elif above is None or amount < above[0]:
+                above = (amount, error)
+
+            return error
+
+        if self._slope is not None:
+            slope = self._slope
+            amount = max(self._amount + (target - self._received) / slope, 0.0)
+        else:
+            # Cold start: the secant through 0 and the target amount is exact for a linear route
+            slope = None
+            amount = 0.0
+
+        error = evaluate(amount)
+        if self._slope is None and error < 0.0:
+            previous, previous_error = amount, error
+            amount = max(target, 1.0)
+            error = evaluate(amount)
+            slope = self._secant(previous, previous_error, amount, error, slope)
+
+        closed = False
+        width = None
+        while abs(error) > self.tolerance and evaluations < self.max_evaluations:
+            if above is not None and above[0] == 0.0:
+                closed = True   # Nothing needs to be sent
+                break
+            if below is not None and above is not None and above[0] - below[0] <= 1e-9 * max(above[0], 1.0):
+                closed = True   # The forward function jumps over the target
+                break
+
+            # A secant stuck on one side of the bracket shrinks it slowly: bisect after any step that did not halve it
+            bisect = width is not None and below is not None and above is not None and above[0] - below[0] > width / 2
+            width = above[0] - below[0] if below is not None and above is not None else None
+
+            previous, previous_error = amount, error
+            amount = self._step(amount, error, None if bisect else slope, below, above)
+            error = evaluate(amount)
+            slope = self._secant(previous, previous_error, amount, error, slope)
+
+        within = abs(error) <= self.tolerance
+        if not within and above is not None:
+            amount, error = above
+
+        self._amount, self._received, self._slope = amount, target + error, slope
+        return Solution(amount=amount, received=target + error, evaluations=evaluations, converged=within or closed)
+
+    @staticmethod
+    def _secant(x0, y0, x1, y1, slope):
+        if x1 != x0 and (y1 - y0) / (x1 - x0) > 0.0:
+            return (y1 - y0) / (x1 - x0)
+
+        return slope
+
+    @staticmethod
+    def _step(amount, error, slope, below, above):
+        step = amount - error / slope if slope else None
+
+        if below is not None and above is not None:
+            if step is None or not below[0] < step < above[0]:
+                step = (below[0] + above[0]) / 2.0
+        elif above is None:
+            # Everything so far falls short: grow at least geometrically
+            floor = below[0]
+            if step is None or step <= floor:
+                step = max(floor * 2.0, 1.0)
+        elif step is None or not 0.0 <= step < above[0]:
+            step = above[0] / 2.0
+
+        return step
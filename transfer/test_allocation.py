@@ -0,0 +1,47 @@
+import pytest
+
+from transfer.allocation import RouteAllocator
+from transfer.constants import Currency
+
+
+class LinearRoute:
+    """Sends `rate * amount - fee`, with the route interface the allocator uses."""
+
+    def __init__(self, rate, fee, currencies=(Currency.ARS, Currency.EUR)):
+        self.rate = rate
+        self.fee = fee
+        self.currencies = currencies
+
+    def send(self, amount, verbose=True):
+        return self.rate * amount - self.fee
+
+
+def test_best_route_is_filled_up_to_its_capacity_first():
+    allocator = RouteAllocator([LinearRoute(1.0, 1.0), LinearRoute(0.9, 0.0)], capacities=[600.0, None])
+    better, worse = allocator.allocate(1000.0)
+
+    assert better.amount == pytest.approx(600.0)
+    assert worse.amount == pytest.approx(400.0)
+    assert allocator.unallocated == 0.0
+
+
+def test_what_capacities_cannot_take_is_unallocated():
+    allocator = RouteAllocator([LinearRoute(1.0, 0.0), LinearRoute(0.9, 0.0)], capacities=[100.0, 100.0])
+    allocations = allocator.allocate(1000.0)
+
+    assert sum(allocation.amount for allocation in allocations) == pytest.approx(200.0)
+    assert allocator.unallocated == pytest.approx(800.0)
+
+
+def test_a_route_smaller_than_one_chunk_is_used():
+    # Chunks are 10, the better route only takes 3
+    allocator = RouteAllocator([LinearRoute(1.0, 0.0), LinearRoute(0.9, 0.0)], capacities=[3.0, None], steps=100)
+    better, worse = allocator.allocate(1000.0)
+
+    assert better.amount == pytest.approx(3.0)
+    assert worse.amount == pytest.approx(997.0)
+
+
+def test_routes_between_different_currencies_are_rejected():
+    with pytest.raises(ValueError):
+        RouteAllocator([LinearRoute(1.0, 0.0), LinearRoute(1.0, 0.0, currencies=(Currency.ARS, Currency.USD))])
@@ -0,0 +1,28 @@
+from transfer.arbitrage import ArbitrageScanner
+from transfer.crypto import BinanceExchange, BitvavoExchange
+
+# Two independent mispriced triangles: BTC is rich against EUR on Binance and against DAI on Bitvavo
+QUOTES = {
+    'Binance': {('BTC', 'USDT'): (30000.0, 30000.0), ('EUR', 'USDT'): (1.1, 1.1), ('BTC', 'EUR'): (28500.0, 28500.0)},
+    'Bitvavo': {('BTC', 'EUR'): (27000.0, 27000.0), ('DAI', 'EUR'): (0.9, 0.9), ('BTC', 'DAI'): (32000.0, 32000.0)},
+}
+
+
+def test_scan_reports_every_independent_cycle():
+    # The search resumes after each cycle it reports, so the second triangle is found in the same pass
+    scanner = ArbitrageScanner([BinanceExchange(), BitvavoExchange()], notional=1000.0)
+    cycles = scanner.scan(QUOTES)
+    found = [frozenset(cycle.hops) for cycle in cycles]
+
+    assert frozenset({('Binance', 'BTC'), ('Binance', 'EUR'), ('Binance', 'USDT')}) in found
+    assert frozenset({('Bitvavo', 'BTC'), ('Bitvavo', 'DAI'), ('Bitvavo', 'EUR')}) in found
+    assert all(cycle.net_return > 0.0 for cycle in cycles)
+
+
+def test_fair_quotes_have_no_cycle():
+    fair = {
+        'Binance': {('BTC', 'USDT'): (29990.0, 30010.0), ('EUR', 'USDT'): (1.099, 1.101),
+                    ('BTC', 'EUR'): (27260.0, 27290.0)},
+    }
+
+    assert ArbitrageScanner([BinanceExchange()]).scan(fair) == []
@@ -0,0 +1,71 @@
+import io
+import random
+
+from transfer.history import DeltaEncoder, DeltaDecoder, RateHistory
+from transfer.snapshot import MarketSnapshot
+
+
+def _stream(frames, keyframe_interval):
+    """Quotes moving a few pairs per frame, with BNB/USDT listed at frame 6 and ETH/BTC delisted at frame 9."""
+    rng = random.Random(7)
+    prices = {('BTC', 'USDT'): 30000.0, ('ETH', 'USDT'): 2000.0, ('ETH', 'BTC'): 0.066, ('DAI', 'USDT'): 1.0}
+    history = []
+    buffer = io.BytesIO()
+    encoder = DeltaEncoder(buffer, keyframe_interval=keyframe_interval)
+
+    for frame in range(frames):
+        if frame == 6:
+            prices[('BNB', 'USDT')] = 300.0
+        if frame == 9:
+            del prices[('ETH', 'BTC')]
+        for pair in rng.sample(sorted(prices), 2):
+            prices[pair] = round(prices[pair] * rng.uniform(0.99, 1.01), 8)
+
+        quotes = {pair: (price, round(price * 1.001, 8)) for pair, price in prices.items()}
+        captured_at = 1.7e9 + frame * 2.0 + rng.choice((0.0, 0.0, 0.25))
+        encoder.write(quotes, captured_at)
+        history.append((round(captured_at * 1000) / 1000, quotes))
+
+    return buffer.getvalue(), history
+
+
+def test_round_trip_across_keyframes_and_listing_changes():
+    data, history = _stream(frames=15, keyframe_interval=4)
+    decoder = DeltaDecoder(data)
+
+    assert len(decoder) == len(history)
+    # Every 4th frame counted from the start (0, 4, 8, 12), plus the listing at 6 and the delisting at 9
+    assert decoder.keyframes == [0, 4, 6, 8, 9, 12]
+    assert list(decoder) == history
+    for frame in reversed(range(len(history))):
+        assert decoder.snapshot(frame) == history[frame]
+    assert decoder.snapshot(-1) == history[-1]
+
+
+def test_unchanged_quotes_cost_a_few_bytes():
+    buffer = io.BytesIO()
+    encoder = DeltaEncoder(buffer)
+    quotes = {('BTC', 'EUR'): (27000.5, 27001.25)}
+
+    encoder.write(quotes, 1.7e9)
+    encoder.write(quotes, 1.7e9 + 2.0)
+    size = len(buffer.getvalue())
+    encoder.write(quotes, 1.7e9 + 4.0)
+
+    # Length, frame type, a zero delta-of-delta and no changes
+    assert len(buffer.getvalue()) - size == 4
+
+
+def test_history_appends_to_existing_files(tmp_path):
+    snapshot = MarketSnapshot().replace({'bitvavo': {('BTC', 'EUR'): (27000.5, 27001.25)}}, captured_at=1.7e9)
+    history = RateHistory(tmp_path)
+    history.record(snapshot)
+    history.close()
+
+    moved = snapshot.replace({'bitvavo': {('BTC', 'EUR'): (26990.0, 26991.0)}}, captured_at=1.7e9 + 2.0)
+    history = RateHistory(tmp_path)
+    history.record(moved)
+
+    decoder = history.venue('bitvavo')
+    assert [quotes for _, quotes in decoder] == [{('BTC', 'EUR'): (27000.5, 27001.25)},
+                                                 {('BTC', 'EUR'): (26990.0, 26991.0)}]
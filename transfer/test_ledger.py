@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from transfer.bank import BancoGalicia
+from transfer.constants import Currency
+from transfer.crypto import LetsBitExchange, BinanceExchange
+from transfer.institution import Account
+from transfer.ledger import BatchLedger
+from transfer.matrix import CURRENCIES
+from transfer.route import Transfer, Exchange
+from transfer.snapshot import MarketSnapshot
+
+SNAPSHOT = MarketSnapshot().replace(
+    {
+        'letsbit': {('BTC', 'ARS'): (29800000.0, 30100000.0), ('USDT', 'ARS'): (1000.0, 1012.0)},
+        'binance': {('BTC', 'USDT'): (30000.0, 30000.0), ('BTC', 'EUR'): (27100.0, 27100.0),
+                    ('EUR', 'USDT'): (1.1, 1.1)},
+    },
+    # Every currency has a fee, so no oracle is asked
+    {currency: {Currency.BTC: 0.0001, Currency.USDT: 2.5}.get(currency, 0.0) for currency in Currency},
+    captured_at=0.0,
+)
+
+
+def _venues():
+    venues = [BancoGalicia(), LetsBitExchange(), BinanceExchange()]
+    for venue in venues[1:]:
+        venue.freeze(SNAPSHOT)
+
+    return venues
+
+
+def _operations(ledger, count, rng):
+    """Random operations among every transfer and listed exchange the ledger can price."""
+    currencies = len(CURRENCIES)
+    venues = range(len(ledger.venues))
+    candidates = [
+        (ledger.account(src_venue, src), ledger.account(dst_venue, dst))
+        for src_venue in venues for dst_venue in venues for src in range(currencies) for dst in range(currencies)
+        if (src == dst and src_venue != dst_venue)
+        or (src_venue == dst_venue and src != dst and not np.isnan(ledger._rates[src_venue, src, dst]))
+    ]
+    picks = rng.integers(len(candidates), size=count)
+    src, dst = np.array(candidates)[picks].T
+    amounts = rng.uniform(0.0, 1.0, size=count) * np.maximum(ledger.balances.ravel()[src], 1.0) / 3
+
+    return src, dst, amounts
+
+
+def _replay(venues, initial_balances, src, dst, amounts):
+    """Execute the operations one by one through the institutions, the way a route does."""
+    currencies = len(CURRENCIES)
+    accounts = [Account(venue, currency, balance) for venue, balances in zip(venues, initial_balances)
+                for currency, balance in zip(CURRENCIES, balances)]
+    violations = []
+
+    for k, (src_account, dst_account, amount) in enumerate(zip(src, dst, amounts)):
+        src_account, dst_account = accounts[src_account], accounts[dst_account]
+        if src_account.currency == dst_account.currency:
+            tx = Transfer(amount=amount, src_account=src_account, dst_account=dst_account)
+        else:
+            tx = Exchange(amount=amount, src_account=src_account, dst_account=dst_account)
+        tx.reverse = False
+        tx.execute()
+
+        if src_account.balance < -1e-9:
+            violations.append(k)
+
+    return np.array([account.balance for account in accounts]).reshape(-1, currencies), violations
+
+
+def test_batches_match_a_sequential_replay():
+    rng = np.random.default_rng(3)
+    venues = _venues()
+    initial_balances = np.zeros((len(venues), len(CURRENCIES)))
+    initial_balances[0, CURRENCIES.index(Currency.ARS)] = 1e7
+    initial_balances[1, CURRENCIES.index(Currency.BTC)] = 0.5
+
+    ledger = BatchLedger(venues, initial_balances)
+    ledger.chunk_size = 128     # Several chunks, so overdrafts are tracked across chunk boundaries
+    src, dst, amounts = _operations(ledger, 1000, rng)
+    ledger.apply(src, dst, amounts)
+
+    balances, violations = _replay(_venues(), initial_balances, src, dst, amounts)
+
+    assert np.allclose(ledger.balances, balances, rtol=1e-9, atol=1e-9)
+    assert ledger.violations().tolist() == violations
+    assert 0 < len(violations) < len(amounts)
+
+
+def test_operations_that_are_neither_a_transfer_nor_an_exchange_are_rejected():
+    ledger = BatchLedger(_venues())
+    src = ledger.account('LetsBit', Currency.BTC)
+    dst = ledger.account('Binance', Currency.EUR)
+
+    with pytest.raises(ValueError):
+        ledger.apply([src], [dst], [1.0])
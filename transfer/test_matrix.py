@@ -0,0 +1,78 @@
+import random
+
+import numpy as np
+import pytest
+
+from transfer.constants import Currency
+from transfer.matrix import RateMatrix, CURRENCIES
+from transfer.oracle import CryptoOracle
+
+CODES = [currency.value for currency in CURRENCIES]
+
+
+def _random_quotes(rng):
+    quotes = {}
+    for base, quote in rng.sample([(b, q) for b in CODES for q in CODES if b < q], rng.randint(0, 10)):
+        bid = rng.uniform(0.01, 1000.0)
+        quotes[(base, quote)] = (bid, bid * rng.uniform(1.0, 1.01))
+
+    return quotes
+
+
+def _assert_same(matrix, expected):
+    assert np.array_equal(matrix.bids, expected.bids, equal_nan=True)
+    assert np.array_equal(matrix.asks, expected.asks, equal_nan=True)
+    assert np.array_equal(matrix.synthetic, expected.synthetic)
+
+
+def test_refresh_matches_a_full_rebuild():
+    rng = random.Random(11)
+    quotes = _random_quotes(rng)
+    matrix = RateMatrix(quotes)
+
+    for _ in range(500):
+        quotes = dict(quotes)
+        for pair in rng.sample(sorted(quotes), min(len(quotes), rng.randint(0, 2))):
+            del quotes[pair]
+        for pair, quote in _random_quotes(rng).items():
+            if rng.random() < 0.3:
+                quotes[pair] = quote
+        for pair in rng.sample(sorted(quotes), min(len(quotes), rng.randint(0, 3))):
+            quotes[pair] = (quotes[pair][0] * 1.01, quotes[pair][1] * 1.01)
+
+        matrix = matrix.refresh(quotes)
+        _assert_same(matrix, RateMatrix(quotes))
+
+
+def test_refresh_without_changes_returns_the_same_matrix():
+    quotes = {('BTC', 'USDT'): (30000.0, 30010.0), ('FOO', 'USDT'): (1.0, 1.0)}
+    matrix = RateMatrix(quotes)
+
+    assert matrix.refresh(dict(quotes)) is matrix
+
+
+def test_implied_rates_fall_back_between_pivots():
+    # BTC/EUR is only implied through USDT; once USDT/EUR is delisted, through USD
+    quotes = {('BTC', 'USDT'): (30000.0, 30000.0), ('EUR', 'USDT'): (1.1, 1.1),
+              ('BTC', 'USD'): (29000.0, 29000.0), ('EUR', 'USD'): (1.0, 1.0)}
+    matrix = RateMatrix(quotes)
+    assert matrix.bid(Currency.BTC, Currency.EUR) == pytest.approx(30000.0 / 1.1)
+    assert matrix.is_synthetic(Currency.BTC, Currency.EUR)
+
+    del quotes[('EUR', 'USDT')]
+    matrix = matrix.refresh(quotes)
+    assert matrix.bid(Currency.BTC, Currency.EUR) == pytest.approx(29000.0)
+    with pytest.raises(ValueError):
+        matrix.bid(Currency.BTC, Currency.EUR, implied=False)
+
+
+def test_oracle_cross_rate_between_non_usd_currencies(monkeypatch):
+    async def prices():
+        return {'BTC': 30000.0, 'ETH': 2000.0, 'USDT': 1.0, 'FOO': 3.0}
+
+    monkeypatch.setattr(CryptoOracle, '_get_prices_async', staticmethod(prices))
+
+    assert CryptoOracle.exchange_rate(Currency.BTC, Currency.ETH) == pytest.approx(15.0)
+    assert CryptoOracle.exchange_rate(Currency.ETH, Currency.USDT) == pytest.approx(2000.0)
+    with pytest.raises(ValueError):
+        CryptoOracle.exchange_rate(Currency.ETH, Currency.ARS)
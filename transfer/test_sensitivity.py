@@ -0,0 +1,36 @@
+from transfer.constants import Currency
+from transfer.sensitivity import analyze_routes
+from transfer.snapshot import MarketSnapshot
+
+# Pays the USDT network fee twice: LetsBit to MyEtherWallet, then MyEtherWallet to Binance
+ROUTE = {
+    'direction': 'send',
+    'amount': 140000.0,
+    'hops': [
+        {'institution': 'Banco Galicia ARG', 'currency': 'ARS'},
+        {'institution': "Let's Bit", 'currency': 'ARS'},
+        {'institution': "Let's Bit", 'currency': 'USDT'},
+        {'institution': 'MyEtherWallet', 'currency': 'USDT'},
+        {'institution': 'Binance', 'currency': 'USDT'},
+        {'institution': 'Binance', 'currency': 'EUR'},
+        {'institution': 'Rabobank NL', 'currency': 'EUR'},
+    ],
+}
+QUOTES = {'letsbit': {('USDT', 'ARS'): (1000.0, 1012.0)}, 'binance': {('EUR', 'USDT'): (1.1, 1.1)}}
+
+
+def _snapshot(usdt_fee):
+    return MarketSnapshot().replace(QUOTES, {currency: usdt_fee if currency == Currency.USDT else 0.0
+                                             for currency in Currency})
+
+
+def test_a_fee_paid_on_several_hops_is_one_input():
+    analysis = analyze_routes([ROUTE], snapshot=_snapshot(2.5))
+    fees = [s for s in analysis.sensitivities() if s.input.name == 'USDT network fee']
+
+    step = 1e-3
+    moved = analyze_routes([ROUTE], snapshot=_snapshot(2.5 + step))
+    expected = (moved.effective_rates[0] - analysis.effective_rates[0]) / step
+
+    assert len(fees) == 1
+    assert abs(fees[0].derivative - expected) < 1e-4 * abs(expected)
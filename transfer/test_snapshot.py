@@ -0,0 +1,27 @@
+import transfer.venue as venues
+from transfer.constants import Currency
+from transfer.crypto import CryptoWallet
+from transfer.snapshot import MarketSnapshot
+
+
+def test_failed_venue_keeps_its_previous_capture(monkeypatch):
+    quotes = {'bitvavo': {('BTC', 'EUR'): (27000.0, 27010.0)}}
+
+    async def fetch(adapter):
+        if adapter.name not in quotes:
+            raise ConnectionError(adapter.name)
+        return quotes[adapter.name]
+
+    async def network_fee(currency):
+        return 0.0001
+
+    monkeypatch.setattr(venues.VenueAdapter, 'quotes_async', fetch)
+    monkeypatch.setattr(CryptoWallet, 'network_fee_async', staticmethod(network_fee))
+
+    snapshot = MarketSnapshot.capture(['bitvavo', 'bitex'], [Currency.BTC])
+    assert list(snapshot.venues) == ['bitvavo']
+
+    del quotes['bitvavo']
+    refreshed = snapshot.refresh(['bitvavo', 'bitex'], [Currency.BTC])
+    assert refreshed.venues['bitvavo'] is snapshot.venues['bitvavo']
+    assert refreshed.fees[Currency.BTC].captured_at >= snapshot.venues['bitvavo'].captured_at
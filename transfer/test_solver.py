@@ -0,0 +1,58 @@
+from transfer.solver import InverseSolver
+
+
+def linear(rate, fee):
+    return lambda amount: amount * rate - fee
+
+
+def depth_and_tiers(amount):
+    """Price worsening with size, and a fee that drops from 5 to 2 once 50 is received."""
+    received = 0.001 * amount / (1.0 + amount / 5e6)
+    return received - (5.0 if received < 50.0 else 2.0)
+
+
+def test_linear_route_is_solved_by_the_first_secant():
+    solver = InverseSolver(linear(1 / 1200, 2.5))
+    solution = solver.solve(100.0)
+
+    assert solution.converged
+    assert solution.evaluations <= 3
+    assert abs(solution.amount - 102.5 * 1200) < 1e-6
+
+
+def test_warm_start_follows_moving_prices():
+    rate = 1 / 1200
+    solver = InverseSolver(lambda amount: amount * rate - 2.5)
+    solver.solve(100.0)
+
+    for _ in range(20):
+        rate *= 1.001
+        solution = solver.solve(100.0)
+        assert solution.converged
+        assert solution.evaluations <= 3
+        assert abs(solution.received - 100.0) <= solver.tolerance
+
+
+def test_non_linear_forward():
+    solver = InverseSolver(depth_and_tiers)
+
+    for target in (10.0, 60.0, 1000.0, 30.0):
+        solution = solver.solve(target)
+        assert solution.converged
+        assert abs(depth_and_tiers(solution.amount) - target) <= solver.tolerance
+
+
+def test_jump_over_the_target_returns_the_smallest_amount_reaching_it():
+    # 46 is never received exactly: below 50 the fee is 5, from 50 on it is 2
+    solution = InverseSolver(depth_and_tiers).solve(46.0)
+
+    assert solution.converged
+    assert depth_and_tiers(solution.amount) >= 46.0
+    assert depth_and_tiers(solution.amount * (1.0 - 1e-6)) < 46.0
+
+
+def test_nothing_to_send():
+    solution = InverseSolver(linear(1.0, 5.0)).solve(-10.0)
+
+    assert solution.converged
+    assert solution.amount == 0.0
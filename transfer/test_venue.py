@@ -0,0 +1,57 @@
+import pytest
+
+import transfer.aio as aio
+import transfer.venue as venues
+
+
+def test_keys_are_split_on_quote_assets():
+    document = [
+        {'symbol': 'DAIBUSD', 'price': '1.0001'},
+        {'symbol': 'USDTTRY', 'price': '32.5'},
+        {'symbol': 'BTCUSDT', 'price': '30000'},
+        {'symbol': 'NOQUOTE', 'price': '1'},
+        {'symbol': 'ETHBTC', 'price': '0'},
+    ]
+
+    assert venues.get('binance').parse(document) == {
+        ('DAI', 'BUSD'): (1.0001, 1.0001),
+        ('USDT', 'TRY'): (32.5, 32.5),
+        ('BTC', 'USDT'): (30000.0, 30000.0),
+    }
+
+
+def test_keys_in_price_paths():
+    letsbit = {'btcars': {'ticker': {'buy': '29800000', 'sell': '30100000'}}, 'daiars': {'ticker': {}}}
+    satoshi_tango = {'data': {'compra': {'arsbtc': 29700000}, 'venta': {'arsbtc': 30200000}}}
+
+    assert venues.get('letsbit').parse(letsbit) == {('BTC', 'ARS'): (29800000.0, 30100000.0)}
+    assert venues.get('satoshi_tango').parse(satoshi_tango) == {('BTC', 'ARS'): (29700000.0, 30200000.0)}
+
+
+def test_key_field_records_limited_to_pairs():
+    document = {'data': [{'market': 'ETHARS', 'bid': '1', 'ask': '2'},
+                         {'market': 'BTCARS', 'bid': '29000000', 'ask': '29500000'}]}
+
+    assert venues.get('cryptomarket').parse(document) == {('BTC', 'ARS'): (29000000.0, 29500000.0)}
+
+
+def test_per_pair_urls(monkeypatch):
+    requested = []
+
+    async def get_json(url, headers=None):
+        requested.append(url)
+        return {'ticker': {'max_bid': ['29000000', 'BTC'], 'min_ask': ['29400000', 'BTC']}}
+
+    monkeypatch.setattr(aio, 'get_json', get_json)
+    adapter = venues.VenueAdapter('buda', **{
+        'url': 'https://www.buda.com/api/v2/markets/{key}/ticker', 'tickers': 'ticker', 'key': '{base}-{quote}',
+        'case': 'lower', 'bid': 'max_bid.0', 'ask': 'min_ask.0', 'pairs': [['BTC', 'ARS']],
+    })
+
+    assert adapter.quotes() == {('BTC', 'ARS'): (29000000.0, 29400000.0)}
+    assert requested == ['https://www.buda.com/api/v2/markets/btc-ars/ticker']
+
+
+def test_unknown_venue():
+    with pytest.raises(ValueError):
+        venues.get('qubit')
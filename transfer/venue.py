@@ -0,0 +1,170 @@
+import asyncio
+import os
+import re
+import time
+
+import yaml
+
+import transfer.aio as aio
+
+VENUES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'venues.yaml')
+
+
+def _compile_path(path):
+    """Split a dotted path into keys, list indices as ints. '' is the document itself."""
+    return tuple(int(part) if part.isdigit() else part for part in path.split('.')) if path else ()
+
+
+def _resolve(document, path):
+    for part in path:
+        document = document[part]
+
+    return document
+
+
+class VenueAdapter:
+    """
+    Fetch and parse the tickers of one venue from its declaration in venues.yaml.
+
+    All paths, pair keys and the way to split keys are compiled once, so parsing a response is a single pass over
+    it. Quotes are fetched through the shared connection pool and shared by every caller for `max_age` seconds; a
+    caller arriving while a fetch is in flight waits for that same fetch.
+    """
+
+    def __init__(self, name, url, bid, ask, tickers='', key_field=None, key='{base}{quote}', case=None, pairs=None,
+                 quote_assets=None, max_age=2.0):
+        self.name = name
+        self.url = url
+        self.key = key
+        self.case = case
+        self.max_age = max_age
+        self.pairs = [tuple(pair) for pair in pairs] if pairs else None
+
+        self._tickers = _compile_path(tickers)
+        self._key_field = key_field
+        self._keys = {self.format_key(*pair): pair for pair in self.pairs or ()}
+        self._prices = {key: (self._price_path(bid, key), self._price_path(ask, key)) for key in self._keys}
+        self._split = None
+
+        self._cache = None
+        self._fetched_at = 0.0
+        self._pending = None
+
+        if '{key}' in url:
+            if self.pairs is None:
+                raise ValueError(f'{name}: a per-pair url needs pairs')
+            self._fetch = self._fetch_per_pair
+        elif key_field is not None:
+            self._fetch = self._fetch_document
+            if self.pairs is None:
+                self._split = self._compile_split(quote_assets)
+                self._prices = {None: (self._price_path(bid, None), self._price_path(ask, None))}
+        elif self.pairs is not None:
+            self._fetch = self._fetch_document
+        else:
+            raise ValueError(f'{name}: pairs are needed unless the tickers are records with a key_field')
+
+    def format_key(self, base, quote):
+        key = self.key.format(base=base, quote=quote)
+        return key.lower() if self.case == 'lower' else key.upper() if self.case == 'upper' else key
+
+    @staticmethod
+    def _price_path(path, key):
+        return _compile_path(path.replace('{key}', key) if key is not None else path)
+
+    def _compile_split(self, quote_assets):
+        """A regex reading base and quote back from any key, for venues read without a list of pairs."""
+        flags = re.IGNORECASE if self.case else 0
+        if quote_assets:
+            quote = '|'.join(re.escape(asset) for asset in quote_assets)
+            base = '.+?'
+        else:
+            quote = base = r'[A-Za-z0-9]+?'
+
+        pattern = re.escape(self.key).replace(r'\{base\}', f'(?P<base>{base})').replace(r'\{quote\}',
+                                                                                     f'(?P<quote>{quote})')
+        if '(?P<base>' not in pattern or '(?P<quote>' not in pattern:
+            raise ValueError(f'{self.name}: the key must contain {{base}} and {{quote}}')
+
+        return re.compile(f'^{pattern}$', flags)
+
+    def parse(self, document):
+        """Return {(base, quote): (bid, ask)} from a response of the venue's url."""
+        tickers = _resolve(document, self._tickers)
+        quotes = {}
+
+        if self._key_field is None:
+            for key, pair in self._keys.items():
+                self._read(quotes, pair, tickers, *self._prices[key])
+        elif self._split is None:
+            for record in tickers:
+                key = record.get(self._key_field)
+                if key in self._keys:
+                    self._read(quotes, self._keys[key], record, *self._prices[key])
+        else:
+            bid_path, ask_path = self._prices[None]
+            for record in tickers:
+                match = self._split.match(record.get(self._key_field) or '')
+                if match is not None:
+                    pair = (match.group('base').upper(), match.group('quote').upper())
+                    self._read(quotes, pair, record, bid_path, ask_path)
+
+        return quotes
+
+    @staticmethod
+    def _read(quotes, pair, ticker, bid_path, ask_path):
+        try:
+            bid, ask = float(_resolve(ticker, bid_path)), float(_resolve(ticker, ask_path))
+        except (KeyError, IndexError, TypeError, ValueError):
+            return
+
+        if bid > 0.0 and ask > 0.0:
+            quotes[pair] = (bid, ask)
+
+    async def _fetch_document(self):
+        return self.parse(await aio.get_json(self.url))
+
+    async def _fetch_per_pair(self):
+        keys = list(self._keys)
+        documents = await asyncio.gather(*(aio.get_json(self.url.format(key=key)) for key in keys))
+
+        quotes = {}
+        for key, document in zip(keys, documents):
+            self._read(quotes, self._keys[key], _resolve(document, self._tickers), *self._prices[key])
+
+        return quotes
+
+    async def quotes_async(self):
+        if self._cache is not None and time.monotonic() - self._fetched_at < self.max_age:
+            return self._cache
+
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._fetch())
+
+        pending = self._pending
+        try:
+            quotes = await pending
+        finally:
+            if self._pending is pending:
+                self._pending = None
+
+        self._cache, self._fetched_at = quotes, time.monotonic()
+        return quotes
+
+    def quotes(self):
+        return aio.run(self.quotes_async())
+
+
+def _load(path=VENUES_FILE):
+    with open(path) as venues_file:
+        return {name: VenueAdapter(name=name, **spec) for name, spec in yaml.safe_load(venues_file).items()}
+
+
+VENUES = _load()
+
+
+def get(name):
+    try:
+        return VENUES[name]
+    except KeyError:
+        raise ValueError(f'Unknown venue: {name}')